@@ -0,0 +1,188 @@
+"""Микробенчмарк маппинга задач: разбор стикеров в цикле против индекса стикеров.
+
+Запуск из корня репозитория (БД и API не нужны):
+
+    python -m benchmarks.bench_mapping
+    python -m benchmarks.bench_mapping --tasks 100000 --repeat 5
+
+«naive» — прежний цикл: для каждой задачи перебор стикеров, поиск в
+sticker_states, .lower() и проверки на «спринт»/«sprint». «indexed» —
+TaskMapper: сжатие в TaskRecord и индекс build_sticker_index. Задачи
+маппятся страницами по PAGE_SIZE, как в синхронизации; прогоны путей
+чередуются. Результаты обоих путей сверяются; ``--memory`` дополнительно
+сравнивает память страницы dict-ов и TaskRecord.
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from db import DEFAULT_PROFILE
+from sync_engine import TaskMapper, _parse_dt
+from yougile_api import PAGE_SIZE
+
+SPECIAL_BOARD_ID = "board-special"
+SPECIAL_PROJECT_STICKER_ID = "project-special"
+SPECIAL_DIRECTION_STICKER_ID = "direction-special"
+DEFAULT_PROJECT_STICKER_ID = "project-default"
+DEFAULT_DIRECTION_STICKER_ID = "direction-default"
+PROFILES = {
+    DEFAULT_PROFILE: (DEFAULT_PROJECT_STICKER_ID, DEFAULT_DIRECTION_STICKER_ID),
+    SPECIAL_BOARD_ID: (SPECIAL_PROJECT_STICKER_ID, SPECIAL_DIRECTION_STICKER_ID),
+}
+
+
+def _workspace(n_tasks: int, seed: int = 1):
+    """Синтетическое пространство: колонки, стикеры и задачи со стикерами"""
+    rnd = random.Random(seed)
+    boards = [SPECIAL_BOARD_ID] + [f"board-{i}" for i in range(49)]
+    col_to_board = {f"col-{i}": boards[i % len(boards)] for i in range(400)}
+
+    sticker_states = {}
+    groups = [SPECIAL_PROJECT_STICKER_ID, SPECIAL_DIRECTION_STICKER_ID,
+              DEFAULT_PROJECT_STICKER_ID, DEFAULT_DIRECTION_STICKER_ID] + [f"group-{i}" for i in range(16)]
+    sprint_group = "sprint-group"
+    for g, group_id in enumerate(groups):
+        for s in range(12):
+            sticker_states[f"{group_id}:{s}"] = (f"Значение {g}.{s}", group_id, f"Стикер {g}")
+    for s in range(52):
+        sticker_states[f"sprint:{s}"] = (f"Спринт {s}", sprint_group, "Спринты")
+    state_ids = list(sticker_states)
+
+    now_ms = int(time.time() * 1000)
+    tasks = []
+    for i in range(n_tasks):
+        stickers = {f"sticker-{k}": rnd.choice(state_ids) for k in range(rnd.randint(0, 5))}
+        tasks.append({
+            "id": f"task-{i}",
+            "title": f"Задача {i}",
+            "columnId": f"col-{rnd.randrange(420)}",
+            "assigned": [f"user-{rnd.randrange(200)}"],
+            "createdAt": now_ms - rnd.randrange(90 * 86400 * 1000),
+            "timeTracking": {"work": rnd.randrange(40)},
+            "stickers": stickers,
+        })
+    return col_to_board, sticker_states, tasks
+
+
+def _naive_map(tasks_raw, col_to_board, sticker_states):
+    """Маппинг в том виде, в каком он был до индекса стикеров и board_profiles"""
+    task_rows = []
+    skipped_tasks = 0
+    for t in tasks_raw:
+        task_id = t.get("id")
+        if not task_id:
+            continue
+        col_id = t.get("columnId")
+        board_id = col_to_board.get(str(col_id)) if col_id else None
+        if not board_id:
+            skipped_tasks += 1
+            continue
+        title = str(t.get("title") or t.get("name") or "")
+        assignee_id = None
+        assigned = t.get("assigned") or []
+        if assigned:
+            assignee_id = str(assigned[0])
+        created_at = _parse_dt(t.get("createdAt") or t.get("timestamp"))
+        actual_time = None
+        tt = t.get("timeTracking") or {}
+        if "work" in tt:
+            try:
+                actual_time = float(tt["work"])
+            except (ValueError, TypeError):
+                pass
+
+        sprint_name = project_name = direction = state_category = None
+        if board_id == SPECIAL_BOARD_ID:
+            project_sticker_id = SPECIAL_PROJECT_STICKER_ID
+            direction_sticker_id = SPECIAL_DIRECTION_STICKER_ID
+        else:
+            project_sticker_id = DEFAULT_PROJECT_STICKER_ID
+            direction_sticker_id = DEFAULT_DIRECTION_STICKER_ID
+        for state_id in (t.get("stickers") or {}).values():
+            state_id_str = str(state_id)
+            if state_id_str in sticker_states:
+                state_name_val, parent_id, parent_name = sticker_states[state_id_str]
+                if parent_id == project_sticker_id:
+                    project_name = state_name_val
+                elif parent_id == direction_sticker_id:
+                    direction = state_name_val
+                name_lower = state_name_val.lower()
+                if "спринт" in name_lower or "sprint" in name_lower:
+                    sprint_name = state_name_val
+                else:
+                    state_category = parent_name
+
+        task_rows.append((str(task_id), title, board_id, assignee_id, created_at, actual_time,
+                          sprint_name, project_name, direction, state_category))
+    return task_rows, skipped_tasks
+
+
+def _by_pages(map_page, tasks: list[dict]) -> tuple[list[tuple], int]:
+    rows, skipped = [], 0
+    for i in range(0, len(tasks), PAGE_SIZE):
+        page_rows, page_skipped = map_page(tasks[i:i + PAGE_SIZE])
+        rows.extend(page_rows)
+        skipped += page_skipped
+    return rows, skipped
+
+
+def _page_bytes(build, raw: str) -> float:
+    """Память, которую держит build(декодированная страница), байт на задачу"""
+    tracemalloc.start()
+    kept = build(json.loads(raw))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / PAGE_SIZE
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    return _race([fn], repeat)[0]
+
+
+def _race(fns: list, repeat: int) -> list[tuple[float, object]]:
+    """Лучшее время каждой функции; прогоны чередуются, чтобы дрейф машины делился поровну"""
+    best = [float("inf")] * len(fns)
+    results = [None] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            results[i] = None
+            gc.collect()
+            t0 = time.perf_counter()
+            results[i] = fn()
+            best[i] = min(best[i], time.perf_counter() - t0)
+    return list(zip(best, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args()
+
+    col_to_board, sticker_states, tasks = _workspace(args.tasks)
+    build, mapper = _best(lambda: TaskMapper(col_to_board, sticker_states, PROFILES), args.repeat)
+    (naive, naive_result), (indexed, indexed_result) = _race([
+        lambda: _by_pages(lambda page: _naive_map(page, col_to_board, sticker_states), tasks),
+        lambda: _by_pages(mapper.map, tasks),
+    ], args.repeat)
+    assert naive_result == indexed_result, "результаты маппинга расходятся"
+
+    print(f"{'path':>8} {'seconds':>9} {'tasks/s':>10}")
+    print(f"{'naive':>8} {naive:>9.3f} {args.tasks / naive:>10.0f}")
+    print(f"{'indexed':>8} {indexed:>9.3f} {args.tasks / indexed:>10.0f}")
+    print(f"индекс стикеров: {len(sticker_states)} состояний, сборка {build * 1000:.1f} мс; "
+          f"ускорение x{naive / indexed:.2f}")
+    if args.memory:
+        raw = json.dumps(tasks[:PAGE_SIZE])
+        dicts = _page_bytes(lambda page: page, raw)
+        records = _page_bytes(mapper.project_page, raw)
+        print(f"память страницы: dict {dicts:.0f} Б/задача, TaskRecord {records:.0f} Б/задача")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Полная синхронизация против фейкового YouGile и одноразовой схемы PostgreSQL.
+
+Запуск из корня репозитория (нужен только локальный PostgreSQL):
+
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.bench_sync
+    python -m benchmarks.bench_sync --dsn postgresql://localhost/bench --tasks 1000,100000 \\
+        --latency 0.05 --throttle 0.02 --json results.jsonl
+
+Для каждого размера генерируется пространство (benchmarks.workspace), в
+этом процессе поднимается фейковый API (benchmarks.fake_yougile), а
+run_sync_once выполняется в отдельном процессе — так пик RSS относится
+только к синхронизации. Запуски по ``--modes`` идут подряд в одной схеме:
+full, затем incremental (повтор без изменений). Печатается время по фазам,
+число запросов, пик RSS и строк в секунду; ``--json`` дописывает
+результаты построчно для сравнения между изменениями. Остальные настройки
+(SYNC_SHARDS, SYNC_FETCH, PG_PARTITION_TASKS, YOUGILE_API_PAGE_SIZE,
+YOUGILE_API_STREAM_JSON, ...) берутся из окружения; фейковый task-list идёт от
+старых задач к новым, т.е. совместим с YOUGILE_API_TASK_ORDER=asc.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.fake_yougile import FakeYougile
+from benchmarks.workspace import Workspace
+
+SCHEMA = "bench_sync"
+
+
+def _child(mode: str, use_async: bool):
+    """Один запуск run_sync_once; итог — JSON последней строкой stdout"""
+    import asyncio
+    import logging
+    import resource
+
+    logging.basicConfig(level=logging.WARNING)
+    from main_worker import run_sync_once, run_sync_once_async
+
+    t0 = time.perf_counter()
+    if use_async:
+        report = asyncio.run(run_sync_once_async(trigger="bench", mode=mode))
+    else:
+        report = run_sync_once(trigger="bench", mode=mode)
+    wall = time.perf_counter() - t0
+    metrics = report["metrics"]
+    counters = metrics["counters"]
+    print(json.dumps({
+        "mode": report["mode"],
+        "wall": round(wall, 3),
+        "phases": metrics["phases"],
+        "requests": report["http"].get("requests", 0),
+        "throttled": report["http"].get("throttled", 0),
+        "retries": report["http"].get("retries", 0),
+        "bytes_received": report["http"].get("bytes_received", 0),
+        "tasks_fetched": counters.get("tasks_fetched", 0),
+        "tasks_in_window": report["tasks_in_window"],
+        "rows_tasks": report["tasks"],
+        # ru_maxrss в Linux — КиБ; для дочерних процессов (шардов) — максимум по ним
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_child_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }))
+
+
+def _drop_schema(dsn: str, schema: str):
+    from db import connect
+    conn = connect(dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    finally:
+        conn.close()
+
+
+def _run(args, fake: FakeYougile, mode: str) -> dict:
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.dsn,
+        "PG_SCHEMA": args.schema,
+        "YOUGILE_API_TOKEN": "bench",
+        "YOUGILE_API_BASE_URL": fake.url,
+        "YOUGILE_API_RPS": str(args.rps),
+    }
+    cmd = [sys.executable, "-m", "benchmarks.bench_sync", "--child", mode]
+    if args.use_async:
+        cmd.append("--async")
+    proc = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"синхронизация завершилась с кодом {proc.returncode}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", ""))
+    parser.add_argument("--schema", default=SCHEMA)
+    parser.add_argument("--tasks", default="1000,10000,100000", help="размеры пространства через запятую")
+    parser.add_argument("--modes", default="full,incremental")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа API, с")
+    parser.add_argument("--throttle", type=float, default=0.0, help="доля случайных 429")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="лимит фейкового API, запросов/с")
+    parser.add_argument("--rps", type=float, default=50.0, help="YOUGILE_API_RPS клиента")
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--payload", type=int, default=200, help="длина описания задачи, байт")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="run_sync_once_async")
+    parser.add_argument("--json", help="дописать результаты в файл (JSON Lines)")
+    parser.add_argument("--keep", action="store_true", help="не удалять схему после запуска")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.use_async)
+        return
+
+    print(f"{'tasks':>8} {'mode':>11} {'wall, s':>8} {'requests':>8} {'429':>5} "
+          f"{'rss, MB':>8} {'tasks/s':>9} {'rows':>8} {'rows/s':>8}")
+    for n in map(int, args.tasks.split(",")):
+        workspace = Workspace(n, history_days=args.history_days, payload=args.payload)
+        _drop_schema(args.dsn, args.schema)
+        with FakeYougile(workspace, latency=args.latency, throttle=args.throttle,
+                         rate_limit=args.rate_limit) as fake:
+            for mode in args.modes.split(","):
+                result = _run(args, fake, mode)
+                wall = result["wall"] or 1e-9
+                print(f"{n:>8} {result['mode']:>11} {wall:>8.2f} {result['requests']:>8} "
+                      f"{result['throttled']:>5} {max(result['peak_rss_mb'], result['peak_child_rss_mb']):>8.1f} "
+                      f"{result['tasks_fetched'] / wall:>9.0f} {result['rows_tasks']:>8} "
+                      f"{result['rows_tasks'] / wall:>8.0f}")
+                print("         " + ", ".join(f"{phase} {seconds:.2f}"
+                                              for phase, seconds in sorted(result["phases"].items(),
+                                                                           key=lambda item: -item[1])))
+                if args.json:
+                    with open(args.json, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"tasks": n, "requested_mode": mode, "latency": args.latency,
+                                            "throttle": args.throttle, "async": args.use_async,
+                                            "at": time.strftime("%Y-%m-%dT%H:%M:%S"), **result}) + "\n")
+    if not args.keep:
+        _drop_schema(args.dsn, args.schema)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Сравнение путей db.upsert_rows: execute_values против COPY + set-based upsert.
+
+Запуск из корня репозитория против локального PostgreSQL:
+
+    DATABASE_URL=postgresql://localhost/bench python -m benchmarks.bench_upsert
+    python -m benchmarks.bench_upsert --dsn postgresql://localhost/bench --sizes 10000,100000
+
+Для каждого размера замеряются вставка в пустую таблицу tasks и повторный
+upsert тех же строк (обновление). Схема бенчмарка пересоздаётся.
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+from db import connect, ensure_schema, upsert_rows
+from sync_engine import TASK_COLUMNS
+
+
+def _rows(n: int) -> list[tuple]:
+    start = date.today()
+    return [
+        (
+            f"task-{i:08d}",
+            f"Задача {i}",
+            f"board-{i % 50}",
+            f"user-{i % 200}",
+            start - timedelta(days=i % 365),
+            float(i % 40) / 2,
+            f"Спринт {i % 12}",
+            f"Проект {i % 30}",
+            f"Направление {i % 8}",
+            "Статус",
+        )
+        for i in range(n)
+    ]
+
+
+def _prepare(conn, schema: str):
+    with conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+    ensure_schema(conn, schema, force=True)
+    upsert_rows(conn, "boards", ["id", "name"], [(f"board-{i}", f"Доска {i}") for i in range(50)], schema)
+    upsert_rows(conn, "users", ["id", "name"], [(f"user-{i}", f"Пользователь {i}") for i in range(200)], schema)
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL", ""))
+    parser.add_argument("--schema", default="bench_upsert")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    conn = connect(args.dsn)
+    print(f"{'rows':>9} {'method':>7} {'insert, s':>10} {'update, s':>10} {'rows/s':>10}")
+    for n in map(int, args.sizes.split(",")):
+        rows = _rows(n)
+        for method in ("values", "copy"):
+            _prepare(conn, args.schema)
+            insert = _timed(lambda: upsert_rows(conn, "tasks", TASK_COLUMNS, rows, args.schema, method=method))
+            update = _timed(lambda: upsert_rows(conn, "tasks", TASK_COLUMNS, rows, args.schema, method=method))
+            print(f"{n:>9} {method:>7} {insert:>10.2f} {update:>10.2f} {n / insert:>10.0f}")
+    with conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE;")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Локальный фейк YouGile API поверх benchmarks.workspace.Workspace.
+
+Отдаёт boards, users, columns, task-list (offset/limit, columnId),
+string-stickers и sprint-stickers в формате API v2, с задержкой ответа,
+gzip, ETag/304 для справочников и 429 с Retry-After — случайными
+(``throttle``) и при превышении ``rate_limit`` запросов в секунду.
+
+    python -m benchmarks.fake_yougile --tasks 100000 --port 8080 --latency 0.05
+    YOUGILE_API_BASE_URL=http://127.0.0.1:8080/api-v2/ python main_worker.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.workspace import Workspace
+
+# Больше limit API не отдаёт
+MAX_LIMIT = 1000
+PAGINATED = ("boards", "users", "columns", "task-list")
+
+
+class FakeYougile:
+    """Фейковый API в фоновом потоке: ``start()``, ``url``, ``stats``, ``stop()``"""
+
+    def __init__(self, workspace: Workspace, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.02, jitter: float = 0.01, throttle: float = 0.0,
+                 rate_limit: float = 0.0, retry_after: float = 1.0, compress: bool = True, seed: int = 0):
+        self.workspace = workspace
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.compress = compress
+        self.stats = {"requests": 0, "throttled": 0, "not_modified": 0, "bytes_sent": 0}
+        self._random = random.Random(seed)
+        self._recent: deque[float] = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api-v2/"
+
+    def start(self) -> "FakeYougile":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-yougile", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _throttled(self) -> bool:
+        """Учесть запрос; True — ответить 429"""
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            if self.throttle and self._random.random() < self.throttle:
+                self.stats["throttled"] += 1
+                return True
+            if self.rate_limit:
+                while self._recent and now - self._recent[0] > 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.stats["throttled"] += 1
+                    return True
+                self._recent.append(now)
+        return False
+
+    def _body(self, endpoint: str, query: dict) -> dict | None:
+        if endpoint == "task-list":
+            offset = int(query.get("offset", ["0"])[0])
+            limit = min(int(query.get("limit", ["50"])[0]), MAX_LIMIT)
+            content, has_next = self.workspace.tasks(offset, limit, query.get("columnId", [None])[0])
+        else:
+            items = self.workspace.collection(endpoint)
+            if items is None:
+                return None
+            if endpoint not in PAGINATED:
+                return {"content": items}
+            offset = int(query.get("offset", ["0"])[0])
+            limit = min(int(query.get("limit", ["50"])[0]), MAX_LIMIT)
+            content, has_next = items[offset:offset + limit], offset + limit < len(items)
+        return {"paging": {"count": len(content), "limit": limit, "offset": offset, "next": has_next},
+                "content": content}
+
+    def _handler(self) -> type:
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    # Клиент закрыл простаивающее keep-alive соединение
+                    pass
+
+            def _send(self, status: int, body: bytes = b"", headers: dict | None = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Клиент отменил забегающий вперёд запрос
+                    self.close_connection = True
+                    return
+                with fake._lock:
+                    fake.stats["bytes_sent"] += len(body)
+
+            def do_GET(self):
+                if fake.latency or fake.jitter:
+                    time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)))
+                if fake._throttled():
+                    self._send(429, b'{"error": "Too Many Requests"}', {"Retry-After": f"{fake.retry_after:g}"})
+                    return
+                url = urlparse(self.path)
+                endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+                data = fake._body(endpoint, parse_qs(url.query))
+                if data is None:
+                    self._send(404, b'{"error": "Not Found"}')
+                    return
+                body = json.dumps(data, ensure_ascii=False).encode()
+                headers = {"Content-Type": "application/json; charset=utf-8"}
+                if endpoint != "task-list":
+                    etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                    headers["ETag"] = etag
+                    if self.headers.get("If-None-Match") == etag:
+                        with fake._lock:
+                            fake.stats["not_modified"] += 1
+                        self._send(304, headers={"ETag": etag})
+                        return
+                if fake.compress and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    body = gzip.compress(body, compresslevel=1)
+                    headers["Content-Encoding"] = "gzip"
+                self._send(200, body, headers)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа, с")
+    parser.add_argument("--throttle", type=float, default=0.0, help="доля случайных 429")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="запросов/с до 429 (0 — без лимита)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeYougile(Workspace(args.tasks, seed=args.seed), args.host, args.port,
+                       latency=args.latency, throttle=args.throttle, rate_limit=args.rate_limit)
+    print(f"Фейковый YouGile: {fake.url} ({args.tasks} задач)")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(fake.stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Синтетическое пространство YouGile заданного размера для фейкового API.
+
+Задачи не хранятся: ``task(i)`` детерминированно строит i-ю задачу, поэтому
+пространство на 1M задач занимает память только под справочники. Задача i
+лежит в колонке ``i % колонок`` — выборка по columnId тоже ленивая.
+Часть колонок «скрыта» (их нет в /columns, как у удалённых досок): такие
+задачи синхронизация пропускает.
+
+    python -m benchmarks.workspace --tasks 1000
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from collections.abc import Iterator
+
+# Стикеры из начальных board_profiles (db.SCHEMA_SQL) — чтобы маппинг находил проект и направление
+SPECIAL_BOARD_ID = "b3ca4ebc-858e-46b9-8d43-c34035fe9f07"
+PROFILE_STICKERS = {
+    "c3e14cd1-7d09-437c-9fe2-e009fb8cd313": "Проект",
+    "120b46c6-ffac-42cb-87b4-e914077e0404": "Направление",
+    "5b0a3b20-1dbb-4df5-b3e6-37ae4581905a": "Проект (спецдоска)",
+    "093eef50-9bde-4d5a-b790-b902e0d1d1b9": "Направление (спецдоска)",
+}
+
+DAY_MS = 86400 * 1000
+
+
+def _uuid(kind: int, i: int) -> str:
+    return str(uuid.UUID(int=(kind << 64) | i))
+
+
+class Workspace:
+    """Пространство: доски, колонки, пользователи, стикеры и ``tasks`` задач.
+
+    ``history_days`` — на сколько дней назад размазаны даты создания (задачи
+    идут от старых к новым). ``payload`` — длина описания задачи, байт:
+    реальные задачи несут много полей, которые синхронизация не использует.
+    """
+
+    def __init__(self, tasks: int, boards: int | None = None, columns_per_board: int = 6,
+                 users: int | None = None, history_days: int = 365, hidden_columns: int = 2,
+                 payload: int = 200, seed: int = 1):
+        self.n_tasks = tasks
+        self.seed = seed
+        self.payload = payload
+        rnd = random.Random(seed)
+        n_boards = boards or max(2, min(200, tasks // 2000))
+        n_users = users or max(5, min(5000, tasks // 200))
+        self.now_ms = int(time.time() * 1000)
+        self.start_ms = self.now_ms - history_days * DAY_MS
+
+        self.boards = [{"id": SPECIAL_BOARD_ID, "title": "Спецдоска", "deleted": False}] + [
+            {"id": _uuid(1, b), "title": f"Доска {b}", "deleted": False} for b in range(1, n_boards)
+        ]
+        self.columns = [
+            {"id": _uuid(2, b * columns_per_board + c), "title": f"Колонка {c}", "boardId": board["id"],
+             "color": c % 16 + 1, "deleted": False}
+            for b, board in enumerate(self.boards) for c in range(columns_per_board)
+        ]
+        # Колонки задач: видимые + скрытые (их нет в /columns)
+        self.task_columns = [column["id"] for column in self.columns] + [
+            _uuid(2, len(self.columns) + c) for c in range(hidden_columns)
+        ]
+        self.users = [
+            {"id": _uuid(3, u), "email": f"user{u}@example.com", "realName": f"Пользователь {u}",
+             "isAdmin": u == 0, "status": "active"}
+            for u in range(n_users)
+        ]
+
+        groups = [(group_id, name, 8) for group_id, name in PROFILE_STICKERS.items()] + [
+            (_uuid(4, g), f"Категория {g}", 6) for g in range(6)
+        ]
+        self.string_stickers = [
+            {"id": group_id, "name": name, "deleted": False,
+             "states": [{"id": _uuid(5, g * 100 + s), "name": f"{name}: значение {s}"} for s in range(n_states)]}
+            for g, (group_id, name, n_states) in enumerate(groups)
+        ]
+        self.sprint_stickers = [{
+            "id": _uuid(6, 0), "name": "Спринты", "deleted": False,
+            "states": [{"id": _uuid(6, 1 + s), "name": f"Спринт {s}"} for s in range(52)],
+        }]
+        self._sticker_groups = [
+            (group["id"], [state["id"] for state in group["states"]])
+            for group in self.string_stickers + self.sprint_stickers
+        ]
+        self._description = "".join(rnd.choice("абвгдеёжзийклмнопрстуфхцчшщ ") for _ in range(payload))
+
+    def collection(self, endpoint: str) -> list[dict] | None:
+        """Справочник по имени эндпоинта (без task-list)"""
+        return {
+            "boards": self.boards,
+            "users": self.users,
+            "columns": self.columns,
+            "string-stickers": self.string_stickers,
+            "sprint-stickers": self.sprint_stickers,
+        }.get(endpoint)
+
+    def task(self, i: int) -> dict:
+        rnd = random.Random(self.seed * 1_000_003 + i)
+        created = self.start_ms + (self.now_ms - self.start_ms) * i // max(1, self.n_tasks)
+        created += rnd.randrange(DAY_MS)
+        stickers = {
+            group_id: rnd.choice(states)
+            for group_id, states in self._sticker_groups if rnd.random() < 0.6
+        }
+        users = self.users
+        return {
+            "id": _uuid(7, i),
+            "title": f"Задача {i}",
+            "timestamp": min(created, self.now_ms),
+            "columnId": self.task_columns[i % len(self.task_columns)],
+            "description": self._description,
+            "archived": False,
+            "completed": rnd.random() < 0.4,
+            "createdBy": users[rnd.randrange(len(users))]["id"],
+            "assigned": [users[rnd.randrange(len(users))]["id"] for _ in range(rnd.choice((0, 1, 1, 1, 2)))],
+            "deadline": {"deadline": created + rnd.randrange(30) * DAY_MS, "withTime": False},
+            "timeTracking": {"plan": rnd.randrange(40), "work": rnd.randrange(40)},
+            "stickers": stickers,
+        }
+
+    def task_indices(self, column_id: str | None = None) -> range:
+        """Номера задач всего пространства или одной колонки"""
+        if column_id is None:
+            return range(self.n_tasks)
+        try:
+            c = self.task_columns.index(column_id)
+        except ValueError:
+            return range(0)
+        return range(c, self.n_tasks, len(self.task_columns))
+
+    def tasks(self, offset: int, limit: int, column_id: str | None = None) -> tuple[list[dict], bool]:
+        """Страница task-list: (задачи, есть ли следующая)"""
+        indices = self.task_indices(column_id)
+        page = indices[offset:offset + limit]
+        return [self.task(i) for i in page], offset + limit < len(indices)
+
+    def iter_tasks(self) -> Iterator[dict]:
+        return map(self.task, range(self.n_tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    ws = Workspace(args.tasks, seed=args.seed)
+    print(f"досок: {len(ws.boards)}, колонок: {len(ws.columns)} (+{len(ws.task_columns) - len(ws.columns)} скрытых), "
+          f"пользователей: {len(ws.users)}, задач: {ws.n_tasks}")
+    print(json.dumps(ws.task(0), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,3 +3,55 @@ import os
 API_TOKEN = os.getenv("YOUGILE_API_TOKEN", "")
 PG_DSN = os.getenv("DATABASE_URL", "")
 SCHEMA = os.getenv("PG_SCHEMA", "yougile")
+APP_TITLE = os.getenv("APP_TITLE", "YouGile → PostgreSQL")
+
+# Пул соединений PostgreSQL на процесс и таймаут одного запроса, секунд (0 — без таймаута)
+PG_POOL_SIZE = int(os.getenv("PG_POOL_SIZE", "4"))
+PG_STATEMENT_TIMEOUT = float(os.getenv("PG_STATEMENT_TIMEOUT", "600"))
+# Секционировать tasks по месяцам created_at (существующая таблица переносится при старте)
+PG_PARTITION_TASKS = os.getenv("PG_PARTITION_TASKS", "0").lower() in ("1", "true", "yes")
+
+# Параллельная загрузка страниц из API
+API_CONCURRENCY = int(os.getenv("YOUGILE_API_CONCURRENCY", "4"))
+API_RPS = float(os.getenv("YOUGILE_API_RPS", "0.8"))
+# Потолок для адаптивного лимитера (0 — вдвое выше API_RPS)
+API_MAX_RPS = float(os.getenv("YOUGILE_API_MAX_RPS", "0"))
+API_POOL_SIZE = int(os.getenv("YOUGILE_API_POOL_SIZE", "8"))
+# Другой адрес API (например, локальный фейк из benchmarks); пусто — ru.yougile.com
+API_BASE_URL = os.getenv("YOUGILE_API_BASE_URL", "")
+# Размер страницы списков (limit, не больше 1000) и потоковый разбор страниц задач:
+# задачи берутся из ответа по мере прихода байт, без копии всего тела в памяти
+API_PAGE_SIZE = int(os.getenv("YOUGILE_API_PAGE_SIZE", "200"))
+API_STREAM_JSON = os.getenv("YOUGILE_API_STREAM_JSON", "0").lower() in ("1", "true", "yes")
+# Порядок task-list по дате создания (asc — от старых к новым, desc — наоборот):
+# страницы вне окна SYNC_WINDOW_DAYS не загружаются. Пусто — порядок неизвестен, окно только на клиенте
+API_TASK_ORDER = os.getenv("YOUGILE_API_TASK_ORDER", "")
+
+# Режим синхронизации задач: incremental (по курсору) или full (чистка окна 90 дней)
+SYNC_MODE = os.getenv("SYNC_MODE", "incremental")
+# Курсор старше этого срока — полная пересинхронизация окна
+SYNC_CURSOR_MAX_AGE_HOURS = float(os.getenv("SYNC_CURSOR_MAX_AGE_HOURS", "168"))
+# Размер пачки задач для записи в PostgreSQL при потоковой синхронизации
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE", "2000"))
+# Окно синхронизации задач по дате создания, дней (0 — все задачи)
+SYNC_WINDOW_DAYS = int(os.getenv("SYNC_WINDOW_DAYS", "90"))
+# Число процессов-шардов для загрузки задач по доскам (1 — общий поток в одном процессе)
+SYNC_SHARDS = int(os.getenv("SYNC_SHARDS", "1"))
+# Загрузка задач: stream — общий task-list, columns — параллельно по колонкам из /columns
+# (задачи колонок без доски, удалённых колонок, удалённых/архивных и исключённых досок не скачиваются)
+SYNC_FETCH = os.getenv("SYNC_FETCH", "stream")
+# Доски, задачи которых не синхронизируются: id через запятую
+SYNC_EXCLUDE_BOARDS = frozenset(filter(None, map(str.strip, os.getenv("SYNC_EXCLUDE_BOARDS", "").split(","))))
+# TTL кэша справочников API, секунд (0 — проверять при каждом запуске)
+REF_TTL_BOARDS = float(os.getenv("REF_TTL_BOARDS", "3600"))
+REF_TTL_USERS = float(os.getenv("REF_TTL_USERS", "3600"))
+REF_TTL_COLUMNS = float(os.getenv("REF_TTL_COLUMNS", "900"))
+REF_TTL_STICKERS = float(os.getenv("REF_TTL_STICKERS", "3600"))
+
+# Встроенный планировщик веб-сервиса: интервал инкрементальной синхронизации, минут (0 — выключен)
+SCHEDULE_INTERVAL_MINUTES = float(os.getenv("SCHEDULE_INTERVAL_MINUTES", "0"))
+# Интервал полной сверки окна, часов (0 — только инкрементальные)
+SCHEDULE_FULL_INTERVAL_HOURS = float(os.getenv("SCHEDULE_FULL_INTERVAL_HOURS", "24"))
+# Случайный сдвиг запусков, секунд, и потолок паузы после ошибок, минут
+SCHEDULE_JITTER_SECONDS = float(os.getenv("SCHEDULE_JITTER_SECONDS", "30"))
+SCHEDULE_MAX_BACKOFF_MINUTES = float(os.getenv("SCHEDULE_MAX_BACKOFF_MINUTES", "60"))
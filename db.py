@@ -1,5 +1,27 @@
+import logging
+import os
+import re
+import socket
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta
+
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import Json, execute_values
+
+from config import PG_POOL_SIZE, PG_STATEMENT_TIMEOUT, PG_PARTITION_TASKS
+
+logger = logging.getLogger(__name__)
+
+# С этого размера пачки upsert_rows грузит строки через COPY
+COPY_THRESHOLD = 1000
+# Размер пачки id в lookup_rows
+LOOKUP_CHUNK = 5000
+# board_id профиля по умолчанию в board_profiles (доски без своего профиля)
+DEFAULT_PROFILE = "*"
+# Версия SCHEMA_SQL: увеличивать при каждом изменении схемы
+SCHEMA_VERSION = 3
 
 SCHEMA_SQL = """
 CREATE SCHEMA IF NOT EXISTS {schema};
@@ -26,38 +48,630 @@ CREATE TABLE IF NOT EXISTS {schema}.tasks (
     direction TEXT,
     state_category TEXT
 );
+
+-- Хэш отмапленной строки: неизменившиеся задачи не переписываются
+ALTER TABLE {schema}.tasks ADD COLUMN IF NOT EXISTS row_hash TEXT;
+
+{task_indexes}
+
+CREATE TABLE IF NOT EXISTS {schema}.sync_state (
+    name TEXT PRIMARY KEY,
+    last_success_at TIMESTAMPTZ,
+    max_task_ts BIGINT,
+    mode TEXT
+);
+
+-- Последняя успешная полная сверка: планировщик отсчитывает от неё, а не от рестарта
+ALTER TABLE {schema}.sync_state ADD COLUMN IF NOT EXISTS last_full_at TIMESTAMPTZ;
+
+CREATE TABLE IF NOT EXISTS {schema}.sync_runs (
+    id BIGSERIAL PRIMARY KEY,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ,
+    status TEXT NOT NULL DEFAULT 'running',
+    phase TEXT,
+    trigger TEXT,
+    host TEXT,
+    pid INTEGER,
+    counts JSONB NOT NULL DEFAULT '{{}}',
+    api_requests INTEGER,
+    api_bytes BIGINT,
+    error TEXT
+);
+
+-- Роли стикеров по доскам: какой стикер даёт project_name и direction.
+-- board_id = '*' — профиль для досок без своей строки.
+CREATE TABLE IF NOT EXISTS {schema}.board_profiles (
+    board_id TEXT PRIMARY KEY,
+    project_sticker_id TEXT,
+    direction_sticker_id TEXT,
+    comment TEXT
+);
+
+-- Начальные профили (бывшие константы кода) — только в пустую таблицу
+INSERT INTO {schema}.board_profiles (board_id, project_sticker_id, direction_sticker_id, comment)
+SELECT * FROM (VALUES
+    ('*', 'c3e14cd1-7d09-437c-9fe2-e009fb8cd313', '120b46c6-ffac-42cb-87b4-e914077e0404',
+     'По умолчанию'),
+    ('b3ca4ebc-858e-46b9-8d43-c34035fe9f07', '5b0a3b20-1dbb-4df5-b3e6-37ae4581905a',
+     '093eef50-9bde-4d5a-b790-b902e0d1d1b9', NULL)
+) AS seed
+WHERE NOT EXISTS (SELECT 1 FROM {schema}.board_profiles);
+
+-- Кэш справочников API (boards, users, columns, стикеры): страницы и валидаторы
+CREATE TABLE IF NOT EXISTS {schema}.reference_cache (
+    name TEXT PRIMARY KEY,
+    pages JSONB NOT NULL,
+    fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Применённые версии SCHEMA_SQL
+CREATE TABLE IF NOT EXISTS {schema}.schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+# Чистка окна (created_at), отчёты по доскам и исполнителям, каскады внешних ключей
+TASK_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS tasks_created_at_idx ON {schema}.tasks (created_at);
+CREATE INDEX IF NOT EXISTS tasks_board_id_idx ON {schema}.tasks (board_id);
+CREATE INDEX IF NOT EXISTS tasks_assignee_id_idx ON {schema}.tasks (assignee_id);
 """
 
+# Секционированная tasks: ключ секционирования входит в первичный ключ,
+# поэтому created_at обязателен, а upsert идёт по (id, created_at)
+TASKS_PARTITIONED_SQL = """
+CREATE TABLE {schema}.tasks_partitioned (
+    id TEXT NOT NULL,
+    title TEXT,
+    board_id TEXT REFERENCES {schema}.boards(id) ON DELETE CASCADE,
+    assignee_id TEXT REFERENCES {schema}.users(id) ON DELETE SET NULL,
+    created_at DATE NOT NULL,
+    actual_time DOUBLE PRECISION,
+    sprint_name TEXT,
+    project_name TEXT,
+    direction TEXT,
+    state_category TEXT,
+    row_hash TEXT,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+"""
+
+# Ключи ON CONFLICT для upsert_rows
+ID_CONFLICT = ("id",)
+PARTITIONED_TASK_CONFLICT = ("id", "created_at")
+
+def _connect_kwargs(statement_timeout: float = PG_STATEMENT_TIMEOUT) -> dict:
+    if statement_timeout <= 0:
+        return {}
+    return {"options": f"-c statement_timeout={int(statement_timeout * 1000)}"}
+
 def connect(pg_dsn: str):
-    return psycopg2.connect(pg_dsn)
+    return psycopg2.connect(pg_dsn, **_connect_kwargs())
+
+class ConnectionPool:
+    """Пул соединений процесса к одной БД.
+
+    getconn ждёт свободного места, если все ``size`` соединений заняты, и
+    перед выдачей проверяет соединение (SELECT 1): оборванное закрывается и
+    заменяется новым. putconn откатывает незавершённую транзакцию; с
+    ``discard=True`` (или если откат не удался) соединение закрывается.
+    """
+
+    def __init__(self, pg_dsn: str, size: int = PG_POOL_SIZE,
+                 statement_timeout: float = PG_STATEMENT_TIMEOUT):
+        self.pg_dsn = pg_dsn
+        self.size = max(1, size)
+        self.pid = os.getpid()
+        self._connect_kwargs = _connect_kwargs(statement_timeout)
+        self._idle: list = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def getconn(self):
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return psycopg2.connect(self.pg_dsn, **self._connect_kwargs)
+                if _healthy(conn):
+                    return conn
+                conn.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, discard: bool = False):
+        try:
+            if not discard and not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    discard = True
+            if discard or conn.closed:
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+def _healthy(conn) -> bool:
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(pg_dsn: str) -> ConnectionPool:
+    """Пул процесса для DSN (после fork создаётся заново)"""
+    with _pools_lock:
+        pool = _pools.get(pg_dsn)
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[pg_dsn] = ConnectionPool(pg_dsn)
+        return pool
+
+@contextmanager
+def pooled(pg_dsn: str):
+    """Соединение из пула процесса на время блока ``with``"""
+    pool = get_pool(pg_dsn)
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+# (dsn, схема), схема которых в этом процессе уже проверена
+_schema_ready: set[tuple[str, str]] = set()
+
+def _schema_version(cur, schema: str) -> int:
+    cur.execute("SELECT to_regclass(%s);", (f"{schema}.schema_version",))
+    if cur.fetchone()[0] is None:
+        return 0
+    cur.execute(f"SELECT COALESCE(max(version), 0) FROM {schema}.schema_version;")
+    return cur.fetchone()[0]
+
+def _schema_lock(cur, schema: str):
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (f"yougile_schema:{schema}",))
 
-def ensure_schema(conn, schema: str = "public"):
+def ensure_schema(conn, schema: str = "public", force: bool = False,
+                  partition_tasks: bool = PG_PARTITION_TASKS):
+    """Создать или обновить схему, если её версия ниже SCHEMA_VERSION.
+
+    Проверка — один запрос к schema_version и выполняется раз на процесс;
+    SCHEMA_SQL применяется под advisory-lock транзакции, чтобы параллельные
+    процессы не мигрировали одновременно. ``force=True`` проверяет заново
+    (например, после DROP SCHEMA). С ``partition_tasks`` обычная таблица
+    tasks переносится в секционированную по месяцам (обратно — нет).
+    """
+    key = (conn.dsn, schema)
+    if key in _schema_ready and not force:
+        return
     with conn, conn.cursor() as cur:
-        sql = SCHEMA_SQL.format(schema=schema)
-        cur.execute(sql)
+        if _schema_version(cur, schema) < SCHEMA_VERSION:
+            _schema_lock(cur, schema)
+            if _schema_version(cur, schema) < SCHEMA_VERSION:
+                cur.execute(SCHEMA_SQL.format(schema=schema, task_indexes=TASK_INDEXES_SQL.format(schema=schema)))
+                cur.execute(
+                    f"INSERT INTO {schema}.schema_version (version) VALUES (%s) ON CONFLICT DO NOTHING;",
+                    (SCHEMA_VERSION,),
+                )
+    if partition_tasks and not tasks_partitioned(conn, schema):
+        with conn, conn.cursor() as cur:
+            _schema_lock(cur, schema)
+            if not _tasks_partitioned(cur, schema):
+                _partition_tasks(cur, schema)
+        _partitions.pop(schema, None)
+    _schema_ready.add(key)
 
-def get_existing_ids(conn, table: str, schema: str = "public") -> set[str]:
-    """Получить все существующие ID из таблицы"""
-    full_table = f"{schema}.{table}"
-    with conn.cursor() as cur:
-        cur.execute(f"SELECT id FROM {full_table};")
-        return {row[0] for row in cur.fetchall()}
+def _tasks_partitioned(cur, schema: str) -> bool:
+    cur.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s));",
+        (f"{schema}.tasks",),
+    )
+    return cur.fetchone()[0]
 
-def upsert_rows(conn, table: str, columns: list[str], rows: list[tuple], schema: str = "public"):
-    if not rows:
+def tasks_partitioned(conn, schema: str = "public") -> bool:
+    """Секционирована ли таблица tasks (по месяцам created_at)"""
+    with conn, conn.cursor() as cur:
+        return _tasks_partitioned(cur, schema)
+
+def _partition_name(month: date) -> str:
+    return f"tasks_{month:%Y_%m}"
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def _create_partition(cur, schema: str, parent: str, month: date):
+    cur.execute(
+        f"CREATE TABLE IF NOT EXISTS {schema}.{_partition_name(month)} PARTITION OF {schema}.{parent} "
+        f"FOR VALUES FROM (%s) TO (%s);",
+        (month, _next_month(month)),
+    )
+
+def _partition_tasks(cur, schema: str):
+    """Перенести tasks в секционированную таблицу (внутри транзакции ensure_schema)"""
+    cur.execute(f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {schema}.tasks "
+                f"WHERE created_at IS NOT NULL;")
+    months = [row[0] for row in cur.fetchall()]
+    cur.execute(TASKS_PARTITIONED_SQL.format(schema=schema))
+    for month in months:
+        _create_partition(cur, schema, "tasks_partitioned", month)
+    columns = ("id, title, board_id, assignee_id, created_at, actual_time, "
+               "sprint_name, project_name, direction, state_category, row_hash")
+    cur.execute(f"INSERT INTO {schema}.tasks_partitioned ({columns}) "
+                f"SELECT {columns} FROM {schema}.tasks WHERE created_at IS NOT NULL;")
+    moved = cur.rowcount
+    cur.execute(f"DROP TABLE {schema}.tasks;")
+    cur.execute(f"ALTER TABLE {schema}.tasks_partitioned RENAME TO tasks;")
+    cur.execute(f"ALTER INDEX {schema}.tasks_partitioned_pkey RENAME TO tasks_pkey;")
+    cur.execute(TASK_INDEXES_SQL.format(schema=schema))
+    logger.info(f"Таблица {schema}.tasks секционирована по месяцам: секций {len(months)}, задач {moved}")
+
+# Схема → месяцы, секции которых уже есть (кэш процесса)
+_partitions: dict[str, set[date]] = {}
+
+def _existing_partitions(cur, schema: str) -> dict[date, str]:
+    """Месячные секции tasks: {первое число месяца: имя}"""
+    cur.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s);",
+        (f"{schema}.tasks",),
+    )
+    found = {}
+    for (name,) in cur.fetchall():
+        m = re.fullmatch(r"tasks_(\d{4})_(\d{2})", name)
+        if m:
+            found[date(int(m[1]), int(m[2]), 1)] = name
+    return found
+
+def ensure_task_partitions(conn, days, schema: str = "public"):
+    """Создать недостающие месячные секции tasks для дат ``days``"""
+    months = {d.replace(day=1) for d in days if d is not None}
+    known = _partitions.get(schema)
+    if known is not None and months <= known:
         return
-    
+    with conn, conn.cursor() as cur:
+        _schema_lock(cur, schema)
+        known = _partitions[schema] = set(_existing_partitions(cur, schema))
+        for month in sorted(months - known):
+            _create_partition(cur, schema, "tasks", month)
+            known.add(month)
+
+def purge_tasks(conn, since: date, schema: str = "public"):
+    """Удалить задачи с created_at >= ``since``.
+
+    В секционированной tasks месяцы целиком после ``since`` очищаются
+    TRUNCATE их секций, построчный DELETE остаётся только для граничного
+    месяца.
+    """
+    with conn, conn.cursor() as cur:
+        if not _tasks_partitioned(cur, schema):
+            cur.execute(f"DELETE FROM {schema}.tasks WHERE created_at >= %s;", (since,))
+            return
+        partitions = _existing_partitions(cur, schema)
+        whole = [name for month, name in partitions.items() if month >= since]
+        if whole:
+            cur.execute(f"TRUNCATE {', '.join(f'{schema}.{name}' for name in whole)};")
+        boundary = partitions.get(since.replace(day=1))
+        if boundary and since.day > 1:
+            cur.execute(f"DELETE FROM {schema}.{boundary} WHERE created_at >= %s;", (since,))
+
+def lookup_rows(conn, table: str, ids, columns: list[str] | None = None,
+                schema: str = "public") -> dict[str, tuple]:
+    """Найти в таблице только переданные id: {id: (значения columns)}.
+
+    Запрос идёт пачками по LOOKUP_CHUNK через ``id = ANY(%s)``, так что память
+    и время зависят от размера пачки, а не от размера таблицы.
+    """
+    ids = list(dict.fromkeys(ids))
     full_table = f"{schema}.{table}"
-    cols_str = ", ".join(columns)
-    placeholders = ", ".join(["%s"] * len(columns))
-    
-    update_cols = ", ".join([f"{col} = EXCLUDED.{col}" for col in columns if col != "id"])
-    
+    cols_str = ", ".join(["id"] + list(columns or []))
+    found = {}
+    with conn.cursor() as cur:
+        for i in range(0, len(ids), LOOKUP_CHUNK):
+            cur.execute(f"SELECT {cols_str} FROM {full_table} WHERE id = ANY(%s);", (ids[i:i + LOOKUP_CHUNK],))
+            for row in cur:
+                found[row[0]] = row[1:]
+    return found
+
+def get_sync_state(conn, name: str, schema: str = "public") -> tuple | None:
+    """Курсор синхронизации: (last_success_at, max_task_ts, mode) или None"""
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            f"SELECT last_success_at, max_task_ts, mode FROM {schema}.sync_state WHERE name = %s;",
+            (name,),
+        )
+        return cur.fetchone()
+
+def save_sync_state(conn, name: str, max_task_ts: int | None, mode: str, schema: str = "public"):
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {schema}.sync_state (name, last_success_at, max_task_ts, mode, last_full_at)
+            VALUES (%s, now(), %s, %s, CASE WHEN %s = 'full' THEN now() END)
+            ON CONFLICT (name) DO UPDATE SET
+                last_success_at = EXCLUDED.last_success_at,
+                max_task_ts = GREATEST({schema}.sync_state.max_task_ts, EXCLUDED.max_task_ts),
+                mode = EXCLUDED.mode,
+                last_full_at = COALESCE(EXCLUDED.last_full_at, {schema}.sync_state.last_full_at);
+            """,
+            (name, max_task_ts, mode, mode),
+        )
+
+def get_last_full_sync(conn, name: str, schema: str = "public") -> datetime | None:
+    """Время последней успешной полной синхронизации (None — её не было)"""
+    with conn, conn.cursor() as cur:
+        cur.execute(f"SELECT last_full_at FROM {schema}.sync_state WHERE name = %s;", (name,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+def get_board_profiles(conn, schema: str = "public") -> dict[str, tuple[str | None, str | None]]:
+    """Профили досок: {board_id: (project_sticker_id, direction_sticker_id)}, DEFAULT_PROFILE — по умолчанию"""
+    with conn, conn.cursor() as cur:
+        cur.execute(f"SELECT board_id, project_sticker_id, direction_sticker_id FROM {schema}.board_profiles;")
+        return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+def get_reference_cache(conn, schema: str = "public") -> dict[str, tuple[list[dict], datetime]]:
+    """Кэш справочников: {name: (страницы, fetched_at)}"""
+    with conn, conn.cursor() as cur:
+        cur.execute(f"SELECT name, pages, fetched_at FROM {schema}.reference_cache;")
+        return {row[0]: (row[1], row[2]) for row in cur.fetchall()}
+
+def save_reference_cache(conn, name: str, pages: list[dict], schema: str = "public"):
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO {schema}.reference_cache (name, pages, fetched_at)
+            VALUES (%s, %s, now())
+            ON CONFLICT (name) DO UPDATE SET pages = EXCLUDED.pages, fetched_at = EXCLUDED.fetched_at;
+            """,
+            (name, Json(pages)),
+        )
+
+def invalidate_reference_cache(conn, names: list[str] | None = None, schema: str = "public") -> int:
+    """Сбросить кэш справочников (все или ``names``): следующий запуск загрузит их заново"""
+    with conn, conn.cursor() as cur:
+        if names is None:
+            cur.execute(f"DELETE FROM {schema}.reference_cache;")
+        else:
+            cur.execute(f"DELETE FROM {schema}.reference_cache WHERE name = ANY(%s);", (list(names),))
+        return cur.rowcount
+
+class SyncAlreadyRunning(Exception):
+    """Синхронизация этой схемы уже идёт в другом процессе; ``run`` — её запись в sync_runs"""
+
+    def __init__(self, run: dict | None):
+        self.run = run
+        where = f" (запуск #{run['id']}, {run['trigger']}, с {run['started_at']})" if run else ""
+        super().__init__(f"Синхронизация уже выполняется{where}")
+
+def _lock_key(schema: str) -> str:
+    return f"yougile_sync:{schema}"
+
+def current_run(conn, schema: str = "public") -> dict | None:
+    """Последний незавершённый запуск из sync_runs"""
+    with conn, conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT id, started_at, phase, trigger, host, pid, counts
+            FROM {schema}.sync_runs WHERE status = 'running'
+            ORDER BY id DESC LIMIT 1;
+            """
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    keys = ("id", "started_at", "phase", "trigger", "host", "pid", "counts")
+    run = dict(zip(keys, row))
+    run["started_at"] = run["started_at"].isoformat()
+    return run
+
+class SyncRunGuard:
+    """Межпроцессная защита синхронизации и запись в журнал sync_runs.
+
+    На отдельном соединении берётся advisory-lock схемы (pg_try_advisory_lock),
+    поэтому веб, десктоп и cron не запускают синхронизацию одновременно: второй
+    получает SyncAlreadyRunning со ссылкой на текущий запуск. Фаза и счётчики
+    пишутся в sync_runs по ходу, итог — при выходе из ``with``. Соединение
+    берётся из пула; если снять блокировку не удалось, оно закрывается.
+    Если передан ``metrics`` (SyncMetrics), в него пишется время
+    подключения и проверки схемы.
+    """
+
+    def __init__(self, pg_dsn: str, schema: str = "public", trigger: str = "manual", metrics=None):
+        self.pg_dsn = pg_dsn
+        self.schema = schema
+        self.trigger = trigger
+        self.metrics = metrics
+        self.conn = None
+        self.run_id: int | None = None
+        self.counts: dict = {}
+        self.http: dict = {}
+        self._lock = threading.Lock()
+
+    def _timer(self, phase: str):
+        return self.metrics.timer(phase) if self.metrics is not None else nullcontext()
+
+    def __enter__(self):
+        pool = get_pool(self.pg_dsn)
+        with self._timer("db_connect"):
+            self.conn = pool.getconn()
+        try:
+            with self._timer("schema_check"):
+                ensure_schema(self.conn, self.schema)
+            with self.conn, self.conn.cursor() as cur:
+                cur.execute("SELECT pg_try_advisory_lock(hashtext(%s));", (_lock_key(self.schema),))
+                locked = cur.fetchone()[0]
+            if not locked:
+                raise SyncAlreadyRunning(current_run(self.conn, self.schema))
+            with self.conn, self.conn.cursor() as cur:
+                # Блокировка наша — «running» от упавших процессов уже не выполняются
+                cur.execute(
+                    f"UPDATE {self.schema}.sync_runs SET status = 'abandoned', finished_at = now() "
+                    f"WHERE status = 'running';"
+                )
+                cur.execute(
+                    f"""
+                    INSERT INTO {self.schema}.sync_runs (trigger, host, pid, phase)
+                    VALUES (%s, %s, %s, 'start') RETURNING id;
+                    """,
+                    (self.trigger, socket.gethostname(), os.getpid()),
+                )
+                self.run_id = cur.fetchone()[0]
+        except BaseException:
+            # Соединение могло остаться с advisory-lock — в пул не возвращаем
+            pool.putconn(self.conn, discard=True)
+            raise
+        return self
+
+    def track(self, phase: str, counts: dict):
+        """Колбэк прогресса: обновить фазу и счётчики запуска"""
+        with self._lock:
+            self.counts.update(counts)
+            with self.conn, self.conn.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {self.schema}.sync_runs SET phase = %s, counts = %s WHERE id = %s;",
+                    (phase, Json(self.counts), self.run_id),
+                )
+
+    def __exit__(self, exc_type, exc, tb):
+        status = "done" if exc is None else "error"
+        released = False
+        try:
+            with self._lock, self.conn, self.conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    UPDATE {self.schema}.sync_runs
+                    SET finished_at = now(), status = %s, counts = %s,
+                        api_requests = %s, api_bytes = %s, error = %s
+                    WHERE id = %s;
+                    """,
+                    (status, Json(self.counts), self.http.get("requests"),
+                     self.http.get("bytes_received"), None if exc is None else str(exc)[:2000], self.run_id),
+                )
+                cur.execute("SELECT pg_advisory_unlock(hashtext(%s));", (_lock_key(self.schema),))
+            released = True
+        finally:
+            get_pool(self.pg_dsn).putconn(self.conn, discard=not released)
+        return False
+
+class _CopyStream:
+    """Файлоподобный поток строк в текстовом формате COPY.
+
+    Строки сериализуются по мере чтения, весь набор в памяти не собирается.
+    """
+
+    def __init__(self, rows):
+        self._lines = map(_copy_line, rows)
+        self._buf = ""
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self._buf]
+        length = len(self._buf)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if size < 0:
+            self._buf = ""
+            return data
+        self._buf = data[size:]
+        return data[:size]
+
+
+def _copy_value(v) -> str:
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        return "t" if v else "f"
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return (str(v).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+def _copy_line(row: tuple) -> str:
+    return "\t".join(map(_copy_value, row)) + "\n"
+
+def _unique_rows(columns: list[str], rows: list[tuple], conflict: tuple[str, ...]) -> list[tuple]:
+    """Последняя строка на каждый ключ конфликта: повтор ключа в одной пачке сломал бы ON CONFLICT DO UPDATE"""
+    key = [columns.index(col) for col in conflict]
+    if len(key) == 1:
+        i = key[0]
+        unique = {row[i]: row for row in rows}
+    else:
+        unique = {tuple(row[i] for i in key): row for row in rows}
+    return rows if len(unique) == len(rows) else list(unique.values())
+
+def _upsert_sql(columns: list[str], conflict: tuple[str, ...]) -> str:
+    return ", ".join([f"{col} = EXCLUDED.{col}" for col in columns if col not in conflict])
+
+def _values_upsert(cur, full_table: str, columns: list[str], rows: list[tuple],
+                   conflict: tuple[str, ...]) -> int:
+    update_cols = _upsert_sql(columns, conflict)
     sql = f"""
-        INSERT INTO {full_table} ({cols_str})
+        INSERT INTO {full_table} ({", ".join(columns)})
         VALUES %s
-        ON CONFLICT (id) DO UPDATE SET {update_cols};
+        ON CONFLICT ({", ".join(conflict)}) DO UPDATE SET {update_cols}
+        RETURNING id;
     """
+    return len(execute_values(cur, sql, rows, fetch=True))
+
+def _copy_upsert(cur, full_table: str, columns: list[str], rows: list[tuple],
+                 conflict: tuple[str, ...]) -> int:
+    """COPY FROM STDIN во временную таблицу и один set-based upsert в целевую"""
+    cols_str = ", ".join(columns)
+    cur.execute(
+        f"CREATE TEMP TABLE _upsert_stage ON COMMIT DROP AS "
+        f"SELECT {cols_str} FROM {full_table} WITH NO DATA;"
+    )
+    cur.copy_expert(f"COPY _upsert_stage ({cols_str}) FROM STDIN", _CopyStream(rows))
+    update_cols = _upsert_sql(columns, conflict)
+    conflict_str = ", ".join(conflict)
+    cur.execute(f"""
+        INSERT INTO {full_table} ({cols_str})
+        SELECT {cols_str} FROM _upsert_stage
+        ON CONFLICT ({conflict_str}) DO UPDATE SET {update_cols};
+    """)
+    return cur.rowcount
+
+def upsert_rows(conn, table: str, columns: list[str], rows: list[tuple], schema: str = "public",
+                method: str = "auto", conflict: tuple[str, ...] = ID_CONFLICT) -> int:
+    """INSERT ... ON CONFLICT DO UPDATE. Возвращает число реально записанных строк.
+
+    conflict — ключ конфликта (для секционированной tasks — PARTITIONED_TASK_CONFLICT);
+    из строк с одинаковым ключом пишется последняя.
+    method: "values" — execute_values, "copy" — COPY в staging-таблицу и
+    set-based upsert, "auto" — COPY от COPY_THRESHOLD строк.
+    """
+    if not rows:
+        return 0
+    
+    full_table = f"{schema}.{table}"
+    rows = _unique_rows(columns, rows, conflict)
+    if method == "auto":
+        method = "copy" if len(rows) >= COPY_THRESHOLD else "values"
     
     with conn, conn.cursor() as cur:
-        execute_values(cur, sql, rows)
+        if method == "copy":
+            return _copy_upsert(cur, full_table, columns, rows, conflict)
+        return _values_upsert(cur, full_table, columns, rows, conflict)
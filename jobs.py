@@ -0,0 +1,110 @@
+import asyncio
+import copy
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from main_worker import SyncAlreadyRunning, run_sync_once_async
+
+logger = logging.getLogger(__name__)
+
+# Сколько завершённых заданий хранить для /sync/<job_id>
+MAX_FINISHED_JOBS = 50
+
+
+class SyncJobs:
+    """Очередь синхронизаций в фоне: один поток-исполнитель на процесс.
+
+    Пока задание в очереди или выполняется, повторный submit() возвращает его
+    же (дубли склеиваются), поэтому два клика не запускают две синхронизации.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync-job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, dict] = {}
+        self._active: str | None = None
+
+    def submit(self, trigger: str = "web", mode: str | None = None) -> tuple[dict, bool]:
+        """Поставить синхронизацию в очередь: (задание, создано ли новое).
+
+        ``mode`` переопределяет SYNC_MODE ("incremental" / "full").
+        """
+        with self._lock:
+            if self._active is not None:
+                return self._snapshot(self._active), False
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "trigger": trigger,
+                "mode": mode,
+                "status": "queued",
+                "phase": None,
+                "counts": {},
+                "report": None,
+                "error": None,
+                "running": None,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "duration": None,
+            }
+            self._active = job_id
+            self._trim()
+            job = self._snapshot(job_id)
+        self._executor.submit(self._run, job_id)
+        return job, True
+
+    def busy(self) -> bool:
+        """Есть ли задание в очереди или в работе"""
+        with self._lock:
+            return self._active is not None
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            return self._snapshot(job_id) if job_id in self._jobs else None
+
+    def _snapshot(self, job_id: str) -> dict:
+        """Глубокая копия задания (под self._lock): counts и отчёт меняет поток синхронизации,
+        пока вызывающий, например jsonify, их обходит"""
+        return copy.deepcopy(self._jobs[job_id])
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _progress(self, job_id: str):
+        def progress(phase: str, counts: dict):
+            with self._lock:
+                job = self._jobs[job_id]
+                job["phase"] = phase
+                job["counts"].update(counts)
+        return progress
+
+    def _run(self, job_id: str):
+        started = time.time()
+        self._update(job_id, status="running", started_at=started)
+        job = self.get(job_id)
+        try:
+            report = asyncio.run(run_sync_once_async(progress=self._progress(job_id),
+                                                     trigger=job["trigger"], mode=job["mode"]))
+            self._update(job_id, status="done", report=report)
+        except SyncAlreadyRunning as e:
+            # Синхронизацию запустил другой процесс (cron, десктоп, другой воркер)
+            self._update(job_id, status="already_running", error=str(e), running=e.run)
+        except Exception as e:
+            logger.exception("Синхронизация завершилась с ошибкой")
+            self._update(job_id, status="error", error=str(e))
+        finally:
+            finished = time.time()
+            with self._lock:
+                self._jobs[job_id].update(finished_at=finished, duration=round(finished - started, 3))
+                self._active = None
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j["finished_at"] is not None]
+        finished.sort(key=lambda j: j["finished_at"])
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job["id"]]
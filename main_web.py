@@ -1,8 +1,14 @@
 import os
-from flask import Flask, jsonify, render_template_string
-from main_worker import run_sync_once
+from flask import Flask, Response, jsonify, render_template_string, request
+from config import PG_DSN, SCHEMA
+from db import pooled, invalidate_reference_cache
+from jobs import SyncJobs
+from metrics import REGISTRY
+from scheduler import SyncScheduler
 
 app = Flask(__name__)
+sync_jobs = SyncJobs()
+scheduler = SyncScheduler(sync_jobs)
 
 INDEX_HTML = """
 <!doctype html>
@@ -29,6 +35,13 @@ INDEX_HTML = """
     <div class="status" id="status"></div>
   </div>
 <script>
+const sleep = (ms) => new Promise(r => setTimeout(r, ms));
+
+function describe(job) {
+  const counts = Object.entries(job.counts || {}).map(([k, v]) => k + '=' + v).join(', ');
+  return 'Фаза: ' + (job.phase || job.status) + (counts ? '\n' + counts : '');
+}
+
 async function runSync() {
   const btn = document.getElementById('syncBtn');
   const st = document.getElementById('status');
@@ -37,8 +50,20 @@ async function runSync() {
   try {
     const res = await fetch('/sync', { method: 'POST' });
     if (!res.ok) throw new Error('HTTP ' + res.status);
-    const data = await res.json();
-    st.textContent = 'Готово: ' + JSON.stringify(data);
+    let job = await res.json();
+    while (job.status === 'queued' || job.status === 'running') {
+      st.textContent = 'Выполняется...\n' + describe(job);
+      await sleep(2000);
+      const poll = await fetch('/sync/' + job.id);
+      if (!poll.ok) throw new Error('HTTP ' + poll.status);
+      job = await poll.json();
+    }
+    if (job.status === 'error') throw new Error(job.error);
+    if (job.status === 'already_running') {
+      st.textContent = job.error + '\n' + JSON.stringify(job.running);
+      return;
+    }
+    st.textContent = 'Готово за ' + job.duration + ' с: ' + JSON.stringify(job.report);
   } catch (e) {
     st.textContent = 'Ошибка: ' + e.message;
   } finally {
@@ -56,14 +81,38 @@ def index():
 
 @app.get("/status")
 def status():
-    return {"ok": True}, 200
+    return {"ok": True, "scheduler": scheduler.status()}, 200
+
+@app.get("/metrics")
+def metrics():
+    """Метрики синхронизаций процесса в текстовом формате Prometheus"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 @app.post("/sync")
 def manual_sync():
-    run_sync_once()
-    return jsonify({"ok": True}), 200
+    """Поставить синхронизацию в фон; если она уже идёт — вернуть текущее задание"""
+    job, created = sync_jobs.submit()
+    return jsonify({**job, "coalesced": not created}), 202
+
+@app.get("/sync/<job_id>")
+def sync_job(job_id: str):
+    job = sync_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job), 200
+
+@app.post("/reference-cache/invalidate")
+def invalidate_reference():
+    """Сбросить кэш справочников: все или перечисленные в ?name=boards&name=columns"""
+    names = request.args.getlist("name") or None
+    with pooled(PG_DSN) as conn:
+        invalidated = invalidate_reference_cache(conn, names, SCHEMA)
+    return jsonify({"invalidated": invalidated}), 200
 
 if __name__ == "__main__":
+    # Только в процессе сервера: дочерние процессы шардов (__mp_main__) и
+    # воркеры WSGI-сервера импортируют модуль и своего планировщика не заводят
+    scheduler.start()
     raw_port = os.getenv("PORT")
     port = int(raw_port) if raw_port and raw_port.isdigit() else 10000
     app.run(host="0.0.0.0", port=port)
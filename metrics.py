@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+
+
+class SyncMetrics:
+    """Метрики одного запуска: время по фазам и счётчики.
+
+    Фазы могут пересекаться (async-вариант) и повторяться (пачки задач) —
+    время по фазе суммируется.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration: float | None = None
+        self.phases: dict[str, float] = defaultdict(float)
+        self.counters: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add_time(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    @contextmanager
+    def timer(self, phase: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - t0)
+
+    async def timed(self, phase: str, awaitable):
+        t0 = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.add_time(phase, time.perf_counter() - t0)
+
+    def timed_iter(self, phase: str, iterable) -> Iterator:
+        """Итератор, время ожидания следующего элемента которого идёт в ``phase``"""
+        it = iter(iterable)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add_time(phase, time.perf_counter() - t0)
+                return
+            self.add_time(phase, time.perf_counter() - t0)
+            yield item
+
+    async def timed_aiter(self, phase: str, iterable) -> AsyncIterator:
+        it = aiter(iterable)
+        while True:
+            t0 = time.perf_counter()
+            try:
+                item = await anext(it)
+            except StopAsyncIteration:
+                self.add_time(phase, time.perf_counter() - t0)
+                return
+            self.add_time(phase, time.perf_counter() - t0)
+            yield item
+
+    def record_http(self, stats: dict):
+        self.count("http_requests", stats.get("requests", 0))
+        self.count("http_throttled", stats.get("throttled", 0))
+        self.count("http_retries", stats.get("retries", 0))
+        self.count("http_not_modified", stats.get("not_modified", 0))
+        self.count("http_bytes_received", stats.get("bytes_received", 0))
+        self.count("http_connections_opened", stats.get("connections_opened", 0))
+
+    def merge_phases(self, phases: dict[str, float]):
+        """Добавить время фаз другого запуска (шарда); фазы шардов идут параллельно"""
+        with self._lock:
+            for phase, seconds in phases.items():
+                self.phases[phase] += seconds
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "duration": round(self.duration if self.duration is not None
+                                  else time.perf_counter() - self.started, 3),
+                "phases": {phase: round(seconds, 3) for phase, seconds in self.phases.items()},
+                "counters": dict(self.counters),
+            }
+
+
+class MetricsRegistry:
+    """Накопленные за жизнь процесса метрики синхронизаций в формате Prometheus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs: dict[str, int] = defaultdict(int)
+        self.phase_seconds: dict[str, float] = defaultdict(float)
+        self.counters: dict[str, int] = defaultdict(int)
+        self.last_phase_seconds: dict[str, float] = {}
+        self.last_duration: float | None = None
+        self.last_success: float | None = None
+
+    def observe_run(self, metrics: SyncMetrics, status: str):
+        summary = metrics.summary()
+        with self._lock:
+            self.runs[status] += 1
+            for phase, seconds in summary["phases"].items():
+                self.phase_seconds[phase] += seconds
+            for name, value in summary["counters"].items():
+                self.counters[name] += value
+            self.last_phase_seconds = dict(summary["phases"])
+            self.last_duration = summary["duration"]
+            if status == "done":
+                self.last_success = time.time()
+
+    def render(self) -> str:
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        with self._lock:
+            metric("yougile_sync_runs_total", "counter", "Sync runs by final status",
+                   [(f'{{status="{s}"}}', n) for s, n in sorted(self.runs.items())])
+            metric("yougile_sync_phase_seconds_total", "counter", "Time spent per sync phase",
+                   [(f'{{phase="{p}"}}', round(v, 3)) for p, v in sorted(self.phase_seconds.items())])
+            metric("yougile_sync_last_phase_seconds", "gauge", "Time per phase in the last run",
+                   [(f'{{phase="{p}"}}', v) for p, v in sorted(self.last_phase_seconds.items())])
+            for name, value in sorted(self.counters.items()):
+                metric(f"yougile_sync_{name}_total", "counter", f"Sync counter {name}", [("", value)])
+            if self.last_duration is not None:
+                metric("yougile_sync_last_duration_seconds", "gauge", "Wall time of the last run",
+                       [("", self.last_duration)])
+            if self.last_success is not None:
+                metric("yougile_sync_last_success_timestamp_seconds", "gauge",
+                       "Unix time of the last successful run", [("", round(self.last_success, 3))])
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
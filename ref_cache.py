@@ -0,0 +1,71 @@
+import logging
+from datetime import datetime, timezone
+
+from config import REF_TTL_BOARDS, REF_TTL_USERS, REF_TTL_COLUMNS, REF_TTL_STICKERS
+
+logger = logging.getLogger(__name__)
+
+# Справочник → (эндпоинт, постраничный ли, TTL в секундах)
+REFERENCE_COLLECTIONS = {
+    "boards": ("boards", True, REF_TTL_BOARDS),
+    "users": ("users", True, REF_TTL_USERS),
+    "columns": ("columns", True, REF_TTL_COLUMNS),
+    "string-stickers": ("string-stickers", False, REF_TTL_STICKERS),
+    "sprint-stickers": ("sprint-stickers", False, REF_TTL_STICKERS),
+}
+
+
+def _items(pages: list[dict], paginated: bool) -> list:
+    """Элементы справочника: объединённый content страниц или ответы целиком"""
+    if not paginated:
+        return [page["content"] for page in pages if page["content"] is not None]
+    return [item for page in pages for item in page["content"] or []]
+
+
+class ReferenceCache:
+    """Справочники API, сохранённые в таблице reference_cache.
+
+    Пока запись моложе TTL своего справочника, API не запрашивается вовсе.
+    Устаревшая запись ревалидируется условными запросами (ETag /
+    Last-Modified), если API их поддерживает, иначе загружается заново.
+    ``refresh=True`` (полная синхронизация) игнорирует TTL. Сама загрузка и
+    запись в БД — на стороне вызывающего (sync или asyncio).
+    """
+
+    def __init__(self, entries: dict[str, tuple[list[dict], datetime]], refresh: bool = False):
+        self.entries = entries
+        self.refresh = refresh
+        self.hits: set[str] = set()
+        self.expired: set[str] = set()
+
+    def request(self, name: str) -> tuple[str, list[dict] | None, bool]:
+        """Аргументы fetch_pages клиента: (эндпоинт, сохранённые страницы, постраничный ли)"""
+        endpoint, paginated, _ = REFERENCE_COLLECTIONS[name]
+        # Просроченный вручную справочник загружается без условных запросов: 304 вернул бы тот же кэш
+        entry = self.entries.get(name) if name not in self.expired else None
+        return endpoint, entry[0] if entry else None, paginated
+
+    def fresh(self, name: str) -> list | None:
+        """Элементы из кэша, если запись не старше TTL, иначе None"""
+        _, paginated, ttl = REFERENCE_COLLECTIONS[name]
+        entry = self.entries.get(name)
+        if self.refresh or name in self.expired or entry is None or ttl <= 0:
+            return None
+        pages, fetched_at = entry
+        age = (datetime.now(timezone.utc) - fetched_at).total_seconds()
+        if age > ttl:
+            return None
+        self.hits.add(name)
+        logger.info(f"Справочник {name} из кэша (возраст {age:.0f} с)")
+        return _items(pages, paginated)
+
+    def expire(self, name: str):
+        """Перезагрузить справочник в этом запуске, несмотря на TTL"""
+        self.expired.add(name)
+        self.hits.discard(name)
+
+    def store(self, name: str, pages: list[dict]) -> list:
+        """Запомнить загруженные страницы и вернуть элементы"""
+        _, paginated, _ = REFERENCE_COLLECTIONS[name]
+        self.entries[name] = (pages, datetime.now(timezone.utc))
+        return _items(pages, paginated)
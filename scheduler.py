@@ -0,0 +1,112 @@
+import logging
+import random
+import threading
+import time
+
+from config import (PG_DSN, SCHEMA, SCHEDULE_INTERVAL_MINUTES, SCHEDULE_FULL_INTERVAL_HOURS,
+                    SCHEDULE_JITTER_SECONDS, SCHEDULE_MAX_BACKOFF_MINUTES)
+from db import get_last_full_sync, pooled
+from jobs import SyncJobs
+
+logger = logging.getLogger(__name__)
+
+# Как часто проверять, завершилось ли запущенное планировщиком задание, секунд
+POLL_SECONDS = 1.0
+
+
+class SyncScheduler:
+    """Периодическая синхронизация внутри веб-сервиса через SyncJobs.
+
+    Каждые ``interval`` секунд (± ``jitter``) ставится инкрементальная
+    синхронизация, раз в ``full_interval`` — полная сверка окна. Если
+    задание уже идёт (ручной запуск), тик пропускается. После ошибки пауза
+    удваивается до ``max_backoff``; запуск, занятый другим процессом
+    (already_running), ошибкой не считается.
+    """
+
+    def __init__(self, jobs: SyncJobs,
+                 interval: float = SCHEDULE_INTERVAL_MINUTES * 60,
+                 full_interval: float = SCHEDULE_FULL_INTERVAL_HOURS * 3600,
+                 jitter: float = SCHEDULE_JITTER_SECONDS,
+                 max_backoff: float = SCHEDULE_MAX_BACKOFF_MINUTES * 60):
+        self.jobs = jobs
+        self.interval = interval
+        self.full_interval = full_interval
+        self.jitter = jitter
+        self.max_backoff = max(max_backoff, interval)
+        self.failures = 0
+        self.last_full_at = time.time()
+        self.next_run_at: float | None = None
+        self.last_job: dict | None = None
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self.last_full_at = self._last_full_sync()
+        self._schedule(self.interval)
+        self._thread = threading.Thread(target=self._loop, name="sync-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Планировщик синхронизации: каждые {self.interval / 60:g} мин")
+
+    def stop(self):
+        self._stop.set()
+
+    def _last_full_sync(self) -> float:
+        """Последняя полная синхронизация из sync_state: рестарт не откладывает сверку"""
+        try:
+            with pooled(PG_DSN) as conn:
+                last_full = get_last_full_sync(conn, "tasks", SCHEMA)
+        except Exception as e:
+            logger.warning(f"Планировщик: не удалось прочитать sync_state ({e}) — отсчёт полной сверки с запуска")
+            return time.time()
+        return last_full.timestamp() if last_full else 0.0
+
+    def _schedule(self, delay: float):
+        self.next_run_at = time.time() + delay + random.uniform(-self.jitter, self.jitter)
+
+    def _next_mode(self) -> str:
+        if self.full_interval > 0 and time.time() - self.last_full_at >= self.full_interval:
+            return "full"
+        return "incremental"
+
+    def _loop(self):
+        while not self._stop.wait(max(0.0, self.next_run_at - time.time())):
+            if self.jobs.busy():
+                self.skipped += 1
+                logger.info("Планировщик: синхронизация уже идёт — тик пропущен")
+                self._schedule(self.interval)
+                continue
+            mode = self._next_mode()
+            job, _ = self.jobs.submit(trigger="schedule", mode=mode)
+            while job["status"] in ("queued", "running") and not self._stop.wait(POLL_SECONDS):
+                job = self.jobs.get(job["id"]) or {**job, "status": "error"}
+            self.last_job = job
+            if job["status"] == "error":
+                self.failures += 1
+                delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+                logger.warning(f"Планировщик: ошибка синхронизации, следующая попытка через {delay / 60:.1f} мин")
+            else:
+                self.failures = 0
+                delay = self.interval
+                if job["status"] == "done" and mode == "full":
+                    self.last_full_at = time.time()
+            self._schedule(delay)
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "next_run_at": self.next_run_at,
+            "next_mode": self._next_mode() if self.enabled else None,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_job": {k: self.last_job[k] for k in ("id", "status", "mode", "finished_at")}
+            if self.last_job else None,
+        }
@@ -0,0 +1,922 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date, timedelta, timezone
+
+from config import (API_CONCURRENCY, API_RPS, API_MAX_RPS, API_POOL_SIZE, API_BASE_URL,
+                    API_PAGE_SIZE, API_STREAM_JSON, API_TASK_ORDER,
+                    SYNC_MODE, SYNC_CURSOR_MAX_AGE_HOURS, SYNC_BATCH_SIZE, SYNC_WINDOW_DAYS, SYNC_SHARDS,
+                    SYNC_FETCH, SYNC_EXCLUDE_BOARDS)
+from yougile_api import (YougileClient, SharedRateLimiter, install_rate_limiter,
+                         _collect_sticker_states, _created_seconds)
+from yougile_async import AsyncYougileClient
+from db import (DEFAULT_PROFILE, PARTITIONED_TASK_CONFLICT, ID_CONFLICT, get_pool, upsert_rows,
+                lookup_rows, get_sync_state, save_sync_state, tasks_partitioned, ensure_task_partitions,
+                purge_tasks,
+                get_board_profiles, get_reference_cache, save_reference_cache,
+                SyncRunGuard, SyncAlreadyRunning)
+from metrics import REGISTRY, SyncMetrics
+from ref_cache import ReferenceCache
+
+logger = logging.getLogger(__name__)
+
+# Колбэк прогресса: (фаза, счётчики)
+Progress = Callable[[str, dict], None]
+
+TASK_COLUMNS = ["id", "title", "board_id", "assignee_id", "created_at", "actual_time",
+                "sprint_name", "project_name", "direction", "state_category"]
+_CREATED_AT = TASK_COLUMNS.index("created_at")
+
+
+def _parse_dt(v):
+    """Парсим дату из миллисекунд, секунд или ISO строки, возвращаем date"""
+    try:
+        if not v:
+            return None
+        if isinstance(v, (int, float)):
+            if v > 100000000000:
+                dt = datetime.fromtimestamp(v / 1000.0)
+            else:
+                dt = datetime.fromtimestamp(v)
+            return dt.date()
+        if isinstance(v, str):
+            dt = datetime.fromisoformat(v.replace("Z", "+00:00"))
+            return dt.date()
+        return None
+    except (ValueError, TypeError, OSError):
+        return None
+
+
+def _emit(progress: Progress | None, phase: str, **counts):
+    if progress is not None:
+        progress(phase, counts)
+
+
+def _tee(*callbacks: Progress | None) -> Progress:
+    def progress(phase: str, counts: dict):
+        for callback in callbacks:
+            _emit(callback, phase, **counts)
+    return progress
+
+
+def log_progress(phase: str, counts: dict):
+    """Колбэк прогресса для CLI и сервисов: фаза и счётчики в лог"""
+    logger.info(f"[{phase}] " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+
+def _client_kwargs() -> dict:
+    kwargs = dict(
+        concurrency=API_CONCURRENCY,
+        requests_per_second=API_RPS,
+        max_requests_per_second=API_MAX_RPS or None,
+        pool_size=API_POOL_SIZE,
+        page_size=API_PAGE_SIZE,
+        stream_json=API_STREAM_JSON,
+        task_order=API_TASK_ORDER or None,
+    )
+    if API_BASE_URL:
+        kwargs["base_url"] = API_BASE_URL
+    return kwargs
+
+
+def _task_ts(task: "TaskRecord") -> int | None:
+    """Время создания задачи в мс (маркер новизны для курсора)"""
+    ts = task.created
+    if isinstance(ts, (int, float)) and ts:
+        return int(ts if ts > 100000000000 else ts * 1000)
+    return None
+
+
+def _window_start(window_days: int) -> float | None:
+    """Начало окна синхронизации в секундах эпохи (None — окна нет)"""
+    return time.time() - window_days * 86400 if window_days else None
+
+
+def _filter_window(tasks: list["TaskRecord"], window_days: int) -> list["TaskRecord"]:
+    """Оставляем только задачи за последние ``window_days`` дней (0 — все)"""
+    if not window_days:
+        return tasks
+    cutoff = _window_start(window_days)
+    return [t for t in tasks if (_created_seconds(t.created) or 0) >= cutoff]
+
+
+def _sticker_states(responses: list[dict]) -> dict[str, tuple[str, str, str]]:
+    """{state_id: (name, parent_id, parent_name)} из ответов string-stickers / sprint-stickers"""
+    states_map = {}
+    for data in responses:
+        _collect_sticker_states(data, states_map)
+    return states_map
+
+
+def _sum_stats(*stats: dict) -> dict:
+    total: dict = {}
+    for item in stats:
+        for key, value in item.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def _log_http(stats: dict):
+    logger.info(
+        f"HTTP: запросов={stats['requests']}, соединений открыто={stats['connections_opened']}, "
+        f"переиспользовано={stats['connections_reused']}, получено байт={stats['bytes_received']}"
+    )
+
+
+def _board_rows(boards: list[dict], existing_board_ids: set[str]) -> list[tuple]:
+    """Подготовка данных для досок (только новые)"""
+    board_rows = [
+        (str(b.get("id")), str(b.get("name") or b.get("title") or b.get("caption") or ""))
+        for b in boards
+        if b.get("id") and str(b.get("id")) not in existing_board_ids
+    ]
+    logger.info(f"Новых досок к загрузке: {len(board_rows)}")
+    return board_rows
+
+
+def _missing_boards(columns: list[dict], boards: list[dict]) -> set[str]:
+    """Доски колонок, которых нет в списке досок (кэши досок и колонок разного возраста)"""
+    known = {str(b.get("id")) for b in boards}
+    return {str(c["boardId"]) for c in columns if c.get("boardId") and not c.get("deleted")} - known
+
+
+def _col_to_board(columns: list[dict], boards: list[dict], exclude_boards: frozenset[str] = frozenset(),
+                  skip_inactive: bool = False) -> dict[str, str]:
+    """Колонка → доска без неизвестных и исключённых досок; ``skip_inactive`` — и без удалённых/архивных"""
+    allowed = {
+        str(b.get("id")) for b in boards
+        if b.get("id") and not (skip_inactive and (b.get("deleted") or b.get("archived")))
+    } - exclude_boards
+    col_to_board = {
+        str(c.get("id")): str(c.get("boardId"))
+        for c in columns
+        if c.get("id") and c.get("boardId") and not (skip_inactive and c.get("deleted"))
+        and str(c.get("boardId")) in allowed
+    }
+    missing = _missing_boards(columns, boards)
+    if missing:
+        # Задачи таких колонок нарушили бы внешний ключ tasks.board_id
+        logger.warning(f"Колонки ссылаются на неизвестные доски, пропущены: {', '.join(sorted(missing))}")
+    logger.info(f"Маппинг колонок: {len(col_to_board)} связей")
+    return col_to_board
+
+
+def _api_user_rows(users_api: list[dict], stored_names: dict[str, tuple]) -> list[tuple]:
+    """Пользователи из API, которых нет в БД или чьё имя изменилось (в т.ч. заглушка Unknown User)"""
+    user_rows = []
+    for u in users_api:
+        uid = u.get("id")
+        if uid:
+            uid_str = str(uid)
+            name = str(u.get("realName") or u.get("name") or "")
+            if stored_names.get(uid_str, (None,))[0] != name:
+                user_rows.append((uid_str, name))
+    return user_rows
+
+
+def _unknown_user_rows(tasks: list["TaskRecord"], known_user_ids: set[str]) -> list[tuple]:
+    """Исполнители задач, которых нет ни в БД, ни в списке пользователей API"""
+    user_rows = []
+    seen = set(known_user_ids)
+    for t in tasks:
+        for uid_str in t.assigned:
+            if uid_str not in seen:
+                user_rows.append((uid_str, f"Unknown User {uid_str[:8]}"))
+                seen.add(uid_str)
+    return user_rows
+
+
+def _row_hash(row: tuple) -> str:
+    """Хэш содержимого отмапленной строки (без id)"""
+    payload = "\x1f".join("" if v is None else str(v) for v in row[1:])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+# Слоты стикерных полей в строке задачи (см. TASK_COLUMNS)
+_SPRINT, _PROJECT, _DIRECTION, _CATEGORY = range(4)
+
+
+def _is_sprint(state_name: str) -> bool:
+    name_lower = state_name.lower()
+    return "спринт" in name_lower or "sprint" in name_lower
+
+
+def build_sticker_index(sticker_states: dict[str, tuple[str, str, str]],
+                        project_sticker_id: str | None, direction_sticker_id: str | None) -> dict[str, tuple]:
+    """Индекс стикеров для профиля доски: state_id → ((слот, значение), ...).
+
+    Роль каждого состояния (проект/направление, спринт/категория) вычисляется
+    один раз, а не для каждой задачи: маппинг задачи сводится к поиску в dict
+    и записи значений в слоты в порядке стикеров задачи.
+    """
+    index = {}
+    for state_id, (state_name, parent_id, parent_name) in sticker_states.items():
+        roles = []
+        if parent_id == project_sticker_id:
+            roles.append((_PROJECT, state_name))
+        elif parent_id == direction_sticker_id:
+            roles.append((_DIRECTION, state_name))
+        # Спринт (одинаков для всех досок)
+        if _is_sprint(state_name):
+            roles.append((_SPRINT, state_name))
+        else:
+            roles.append((_CATEGORY, parent_name))
+        index[state_id] = tuple(roles)
+    return index
+
+
+class TaskRecord:
+    """Задача API, сжатая до строки TASK_COLUMNS (None — доска колонки неизвестна), исполнителей и даты создания"""
+
+    __slots__ = ("row", "assigned", "created")
+
+    def __init__(self, row: tuple | None, assigned: tuple[str, ...], created):
+        self.row = row
+        self.assigned = assigned
+        self.created = created
+
+
+class TaskMapper:
+    """Маппинг задач API в строки TASK_COLUMNS через индексы стикеров профилей досок"""
+
+    def __init__(self, col_to_board: dict[str, str], sticker_states: dict[str, tuple[str, str, str]],
+                 profiles: dict[str, tuple[str | None, str | None]]):
+        self.col_to_board = col_to_board
+        self.sticker_states = sticker_states
+        indexes = {}
+
+        def index_for(profile: tuple[str | None, str | None]) -> dict[str, tuple]:
+            if profile not in indexes:
+                indexes[profile] = build_sticker_index(sticker_states, *profile)
+            return indexes[profile]
+
+        default = profiles.get(DEFAULT_PROFILE, (None, None))
+        self.board_index = {
+            board_id: index_for(profiles.get(board_id, default))
+            for board_id in set(col_to_board.values())
+        }
+        self._dates: dict[int, date] = {}
+        self._assigned: dict[str, tuple[str, ...]] = {}
+
+    def project(self, t: dict) -> TaskRecord | None:
+        """Запись задачи API (None — задача без id)"""
+        task_id = t.get("id")
+        if not task_id:
+            return None
+        col_id = t.get("columnId")
+        board_id = self.col_to_board.get(str(col_id)) if col_id else None
+
+        assignee_id = None
+        assigned = t.get("assigned")
+        if assigned:
+            first = assigned[0]
+            single = self._assigned.get(first)
+            if single is None:
+                single = self._assigned[first] = (sys.intern(str(first)),) if first else ()
+            assignee_id = single[0] if single else str(first)
+            if len(assigned) == 1:
+                assigned = single
+            else:
+                assigned = tuple(map(sys.intern, map(str, filter(None, assigned))))
+        else:
+            assigned = ()
+
+        created = t.get("createdAt") or t.get("timestamp")
+        created_at = None
+        if board_id and created:
+            if created.__class__ is int and created > 100000000000:
+                # смещения часовых поясов кратны 15 минутам: локальная дата
+                # одинакова для всего 15-минутного интервала
+                quarter = created // 900000
+                created_at = self._dates.get(quarter)
+                if created_at is None:
+                    created_at = self._dates[quarter] = _parse_dt(created)
+            else:
+                created_at = _parse_dt(created)
+
+        if not board_id:
+            return TaskRecord(None, assigned, created)
+
+        actual_time = None
+        tt = t.get("timeTracking")
+        if tt:
+            work = tt.get("work")
+            if work is not None:
+                try:
+                    actual_time = float(work)
+                except (ValueError, TypeError):
+                    pass
+
+        # sprint_name, project_name, direction, state_category
+        sprint_name = project_name = direction = state_category = None
+        stickers = t.get("stickers")
+        if stickers:
+            stickered = [None, None, None, None]
+            index = self.board_index[board_id]
+            for state_id in stickers.values():
+                roles = index.get(state_id)
+                if roles is None:
+                    if isinstance(state_id, str):
+                        continue
+                    roles = index.get(str(state_id))
+                    if roles is None:
+                        continue
+                for slot, value in roles:
+                    stickered[slot] = value
+            sprint_name, project_name, direction, state_category = stickered
+
+        row = (str(task_id), str(t.get("title") or t.get("name") or ""), board_id, assignee_id, created_at,
+               actual_time, sprint_name, project_name, direction, state_category)
+        return TaskRecord(row, assigned, created)
+
+    def project_page(self, tasks_raw: list[dict]) -> list[TaskRecord]:
+        return [record for record in map(self.project, tasks_raw) if record is not None]
+
+    def map_records(self, records: list[TaskRecord]) -> tuple[list[tuple], int]:
+        """Строки задач и число пропущенных (колонка без доски)"""
+        task_rows = [t.row for t in records if t.row is not None]
+        return task_rows, len(records) - len(task_rows)
+
+    def map(self, tasks_raw: list[dict]) -> tuple[list[tuple], int]:
+        """Строки задач API и число пропущенных (колонка без доски)"""
+        return self.map_records(self.project_page(tasks_raw))
+
+
+class _TaskSink:
+    """Потоковая запись задач: страница → окно → маппинг → пачки с проверкой хэша строки"""
+
+    def __init__(self, engine: "SyncEngine", conn, mode: str, mapper: TaskMapper,
+                 known_user_ids: set[str], cursor_ts: int | None,
+                 progress: Progress | None = None, metrics: SyncMetrics | None = None):
+        self.conn = conn
+        self.schema = engine.schema
+        self.window_days = engine.window_days
+        self.batch_size = engine.batch_size
+        self.progress = progress
+        self.metrics = metrics or SyncMetrics()
+        self.mode = mode
+        self.mapper = mapper
+        self.known_user_ids = known_user_ids
+        self.cursor_ts = cursor_ts
+        self.max_task_ts = cursor_ts
+        self.partitioned = tasks_partitioned(conn, self.schema)
+        self.rows: list[tuple] = []
+        self.fetched = 0
+        self.in_window = 0
+        self.unchanged = 0
+        self.new = 0
+        self.skipped = 0
+        self.users = 0
+        self.touched = 0
+
+    def feed(self, page: list[dict]):
+        """Обработать страницу задач API: dict-ы задач дальше сжатия в TaskRecord не идут"""
+        with self.metrics.timer("mapping"):
+            records = list(map(self.mapper.project, page))
+        self.feed_records(records)
+
+    def feed_records(self, page: list[TaskRecord | None]):
+        """Страница, уже сжатая TaskMapper.project при загрузке (iter_tasks(transform=...))"""
+        self.fetched += len(page)
+        records = [record for record in page if record is not None]
+        window = _filter_window(records, self.window_days)
+        del records
+        self.in_window += len(window)
+        for ts in map(_task_ts, window):
+            if ts is None:
+                continue
+            if self.cursor_ts is None or ts > self.cursor_ts:
+                self.new += 1
+            if self.max_task_ts is None or ts > self.max_task_ts:
+                self.max_task_ts = ts
+
+        assigned = {uid for t in window for uid in t.assigned}
+        unseen = assigned - self.known_user_ids
+        if unseen:
+            with self.metrics.timer("lookup"):
+                self.known_user_ids.update(lookup_rows(self.conn, "users", unseen, schema=self.schema))
+            # Сортировка по id: параллельные шарды берут блокировки строк в одном порядке
+            user_rows = sorted(_unknown_user_rows(window, self.known_user_ids))
+            if user_rows:
+                with self.metrics.timer("upsert_users"):
+                    self.users += upsert_rows(self.conn, "users", ["id", "name"], user_rows, self.schema)
+                self.known_user_ids.update(row[0] for row in user_rows)
+
+        with self.metrics.timer("mapping"):
+            rows, skipped = self.mapper.map_records(window)
+        self.skipped += skipped
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with self.metrics.timer("lookup"):
+            stored = lookup_rows(self.conn, "tasks", (row[0] for row in self.rows), ["row_hash"], self.schema)
+        changed = []
+        with self.metrics.timer("mapping"):
+            for row in self.rows:
+                row_hash = _row_hash(row)
+                if stored.get(row[0], (None,))[0] == row_hash:
+                    self.unchanged += 1
+                    continue
+                changed.append(row + (row_hash,))
+        self.rows = []
+        conflict = ID_CONFLICT
+        if self.partitioned:
+            dated = [row for row in changed if row[_CREATED_AT] is not None]
+            self.skipped += len(changed) - len(dated)
+            changed, conflict = dated, PARTITIONED_TASK_CONFLICT
+            with self.metrics.timer("partitions"):
+                ensure_task_partitions(self.conn, {row[_CREATED_AT] for row in changed}, self.schema)
+        with self.metrics.timer("upsert_tasks"):
+            self.touched += upsert_rows(self.conn, "tasks", TASK_COLUMNS + ["row_hash"], changed, self.schema,
+                                        conflict=conflict)
+        logger.info(f"Задач обработано: {self.fetched}, в окне: {self.in_window}, записано: {self.touched}")
+        _emit(self.progress, "tasks", fetched=self.fetched, in_window=self.in_window,
+              written=self.touched, unchanged=self.unchanged)
+
+    def close(self, save_state: bool = True):
+        """Дописать остаток; курсор сохраняется, если не ``save_state=False`` (шард)"""
+        self.flush()
+        logger.info(
+            f"Задач получено: {self.fetched}, в окне: {self.in_window}, "
+            f"записано (вставлено/изменено): {self.touched}, без изменений: {self.unchanged}, "
+            f"пропущено без доски: {self.skipped}"
+        )
+        if save_state:
+            save_sync_state(self.conn, "tasks", self.max_task_ts, self.mode, self.schema)
+        for name, value in self.counts().items():
+            self.metrics.count(name, value)
+
+    _COUNTS = {"tasks_fetched": "fetched", "tasks_in_window": "in_window", "tasks_unchanged": "unchanged",
+               "tasks_skipped": "skipped", "tasks_new": "new", "rows_tasks": "touched", "rows_users": "users"}
+
+    def counts(self) -> dict[str, int]:
+        return {name: getattr(self, attr) for name, attr in self._COUNTS.items()}
+
+    def merge(self, counts: dict[str, int], max_task_ts: int | None):
+        """Добавить итоги шарда; время фаз шарда сливает SyncMetrics.merge_phases"""
+        for name, attr in self._COUNTS.items():
+            setattr(self, attr, getattr(self, attr) + counts.get(name, 0))
+        if max_task_ts is not None and (self.max_task_ts is None or max_task_ts > self.max_task_ts):
+            self.max_task_ts = max_task_ts
+
+
+def _report(mode: str, boards: int, users: int, sink: _TaskSink, http: dict,
+            metrics: SyncMetrics) -> dict:
+    metrics.count("rows_boards", boards)
+    metrics.count("rows_users", users)
+    metrics.record_http(http)
+    report = {
+        "mode": mode,
+        "boards": boards,
+        "users": users + sink.users,
+        "tasks": sink.touched,
+        "tasks_in_window": sink.in_window,
+        "tasks_unchanged": sink.unchanged,
+        "tasks_new": sink.new,
+        "http": http,
+        "metrics": metrics.summary(),
+    }
+    logger.info(f"Итог: {report}")
+    return report
+
+
+def _observe(metrics: SyncMetrics, exc: BaseException | None):
+    """Учесть завершённый запуск (в т.ч. неудачный) в метриках процесса"""
+    metrics.finish()
+    if exc is None:
+        status = "done"
+    elif isinstance(exc, SyncAlreadyRunning):
+        status = "already_running"
+    else:
+        status = "error"
+    REGISTRY.observe_run(metrics, status)
+
+
+def _shard_columns(col_to_board: dict[str, str], shards: int) -> list[list[str]]:
+    """Разбить колонки на шарды по доскам: доска целиком в одном шарде,
+    шарды выравниваются по числу колонок (жадно, от крупных досок)"""
+    board_columns: dict[str, list[str]] = {}
+    for column_id, board_id in col_to_board.items():
+        board_columns.setdefault(board_id, []).append(column_id)
+    buckets = [[] for _ in range(max(1, shards))]
+    for columns in sorted(board_columns.values(), key=len, reverse=True):
+        min(buckets, key=len).extend(columns)
+    return [bucket for bucket in buckets if bucket]
+
+
+def _init_shard_worker(api_token: str, limiter: SharedRateLimiter):
+    logging.basicConfig(level=logging.INFO)
+    install_rate_limiter(api_token, limiter)
+
+
+def _run_shard(engine: "SyncEngine", columns: list[str], mapper: TaskMapper, mode: str,
+               cursor_ts: int | None, known_user_ids: set[str]) -> dict:
+    """Процесс-воркер: задачи своих колонок — загрузка, маппинг, запись своим соединением"""
+    metrics = SyncMetrics()
+    pool = get_pool(engine.pg_dsn)
+    with metrics.timer("db_connect"):
+        conn = pool.getconn()
+    try:
+        with YougileClient(engine.api_token, **engine.client_kwargs) as client:
+            sink = _TaskSink(engine, conn, mode, mapper, known_user_ids, cursor_ts, metrics=metrics)
+            # Колонки шарда тоже параллельно, упавшая колонка повторяется отдельно
+            pages = client.iter_tasks(mapper.project, columns=columns, since=_window_start(engine.window_days))
+            for page in metrics.timed_iter("api_tasks", pages):
+                sink.feed_records(page)
+            sink.close(save_state=False)
+            http = client.stats()
+    finally:
+        pool.putconn(conn)
+    return {"counts": sink.counts(), "max_task_ts": sink.max_task_ts, "http": http,
+            "phases": metrics.summary()["phases"]}
+
+
+class SyncEngine:
+    """Синхронизация YouGile → PostgreSQL, общая для веба, воркера и десктопа"""
+
+    def __init__(self, api_token: str, pg_dsn: str, schema: str = "public",
+                 mode: str = SYNC_MODE, window_days: int = SYNC_WINDOW_DAYS,
+                 batch_size: int = SYNC_BATCH_SIZE,
+                 cursor_max_age_hours: float = SYNC_CURSOR_MAX_AGE_HOURS,
+                 client_kwargs: dict | None = None, shards: int = SYNC_SHARDS,
+                 fetch: str = SYNC_FETCH, exclude_boards: frozenset[str] = SYNC_EXCLUDE_BOARDS):
+        self.api_token = api_token
+        self.pg_dsn = pg_dsn
+        self.schema = schema
+        self.mode = mode
+        self.window_days = window_days
+        self.batch_size = batch_size
+        self.cursor_max_age_hours = cursor_max_age_hours
+        self.client_kwargs = client_kwargs if client_kwargs is not None else _client_kwargs()
+        self.shards = shards
+        self.fetch = fetch
+        self.exclude_boards = exclude_boards
+
+    def _plan(self, conn) -> tuple[str, int | None]:
+        """Режим запуска: ("incremental", max_task_ts курсора) или ("full", None).
+
+        Полная синхронизация окна — если так настроено, курсора нет или он
+        старше cursor_max_age_hours (например, сервис долго не запускался).
+        """
+        if self.mode == "full":
+            return "full", None
+        state = get_sync_state(conn, "tasks", self.schema)
+        if not state or state[0] is None:
+            logger.info("Курсор синхронизации не найден — полная синхронизация окна")
+            return "full", None
+        last_success_at, max_task_ts, _ = state
+        if datetime.now(timezone.utc) - last_success_at > timedelta(hours=self.cursor_max_age_hours):
+            logger.info(f"Курсор устарел ({last_success_at:%Y-%m-%d %H:%M}) — полная синхронизация окна")
+            return "full", None
+        logger.info(f"Инкрементальная синхронизация, последний успешный запуск: {last_success_at:%Y-%m-%d %H:%M}")
+        return "incremental", max_task_ts
+
+    def _purge_window(self, conn) -> date | None:
+        """Чистим только задачи окна window_days (в секциях — TRUNCATE целых месяцев)"""
+        if not self.window_days:
+            return None
+        cutoff_date = date.today() - timedelta(days=self.window_days)
+        logger.info(f"Удаляем задачи из БД с created_at >= {cutoff_date}")
+        purge_tasks(conn, cutoff_date, self.schema)
+        return cutoff_date
+
+    def _existing_ids(self, conn, table: str, items: list[dict]) -> set[str]:
+        """Какие из id коллекции API уже есть в таблице"""
+        return set(self._stored_names(conn, table, items))
+
+    def _stored_names(self, conn, table: str, items: list[dict]) -> dict[str, tuple]:
+        """{id: (name,)} для id коллекции API, уже записанных в таблицу"""
+        return lookup_rows(conn, table, (str(i["id"]) for i in items if i.get("id")), ["name"], self.schema)
+
+    def _boards_for(self, conn, client: YougileClient, refs: ReferenceCache, boards: list[dict],
+                    columns: list[dict]) -> list[dict]:
+        """Доски из кэша старше колонок: перезагрузить, если колонки ссылаются на неизвестную доску"""
+        if "boards" in refs.hits and _missing_boards(columns, boards):
+            logger.info("Колонки ссылаются на доски не из кэша — обновляем доски")
+            refs.expire("boards")
+            boards = self._reference(conn, client, refs, "boards")
+        return boards
+
+    def _reference(self, conn, client: YougileClient, refs: ReferenceCache, name: str) -> list:
+        """Справочник из кэша или из API (с записью в кэш)"""
+        items = refs.fresh(name)
+        if items is None:
+            pages = client.fetch_pages(*refs.request(name))
+            save_reference_cache(conn, name, pages, self.schema)
+            items = refs.store(name, pages)
+        return items
+
+    def run(self, progress: Progress | None = None, trigger: str = "manual") -> dict:
+        """Синхронный запуск. Возвращает отчёт: режим и число реально
+        затронутых строк по сущностям."""
+        metrics = SyncMetrics()
+        try:
+            with SyncRunGuard(self.pg_dsn, self.schema, trigger, metrics) as guard:
+                report = self._sync(_tee(guard.track, progress), metrics)
+                guard.http = report["http"]
+        except BaseException as e:
+            _observe(metrics, e)
+            raise
+        _observe(metrics, None)
+        return report
+
+    def _sync(self, progress: Progress, metrics: SyncMetrics) -> dict:
+        _emit(progress, "connect")
+        logger.info("Подключение к PostgreSQL…")
+        pool = get_pool(self.pg_dsn)
+        with metrics.timer("db_connect"):
+            conn = pool.getconn()
+        try:
+            # 1. Полный режим чистит окно, инкрементальный обновляет его на месте
+            mode, cursor_ts = self._plan(conn)
+            if mode == "full":
+                with metrics.timer("purge"):
+                    self._purge_window(conn)
+
+            # 2. Справочники: кэш (reference_cache) или API; полный режим кэш ревалидирует
+            _emit(progress, "reference", mode=mode)
+            logger.info("Загрузка данных из API…")
+            refs = ReferenceCache(get_reference_cache(conn, self.schema), refresh=mode == "full")
+            with YougileClient(self.api_token, **self.client_kwargs) as client:
+                with metrics.timer("api_boards"):
+                    boards = self._reference(conn, client, refs, "boards")
+                with metrics.timer("api_users"):
+                    users_api = self._reference(conn, client, refs, "users")
+                with metrics.timer("api_columns"):
+                    columns = self._reference(conn, client, refs, "columns")
+                with metrics.timer("api_boards"):
+                    boards = self._boards_for(conn, client, refs, boards, columns)
+                logger.info(
+                    f"Получено: досок={len(boards)}, пользователей={len(users_api)}, колонок={len(columns)}"
+                )
+
+                logger.info("Загрузка стикеров…")
+                with metrics.timer("api_stickers"):
+                    sticker_states = _sticker_states(
+                        self._reference(conn, client, refs, "string-stickers")
+                        + self._reference(conn, client, refs, "sprint-stickers")
+                    )
+                logger.info(f"Стикеров загружено: {len(sticker_states)}")
+
+                with metrics.timer("lookup"):
+                    existing_board_ids = self._existing_ids(conn, "boards", boards)
+                    stored_users = self._stored_names(conn, "users", users_api)
+                    profiles = get_board_profiles(conn, self.schema)
+
+                with metrics.timer("mapping"):
+                    logger.info("Подготовка досок…")
+                    board_rows = _board_rows(boards, existing_board_ids)
+                    mapper = TaskMapper(_col_to_board(columns, boards, self.exclude_boards, self.fetch == "columns"),
+                                        sticker_states, profiles)
+
+                    logger.info("Подготовка пользователей…")
+                    user_rows = _api_user_rows(users_api, stored_users)
+                    logger.info(f"Новых и переименованных пользователей к загрузке: {len(user_rows)}")
+
+                # --- Сохранение досок и пользователей (до задач: внешние ключи) ---
+                boards_touched = users_touched = 0
+                if board_rows:
+                    logger.info("Сохранение новых досок…")
+                    with metrics.timer("upsert_boards"):
+                        boards_touched = upsert_rows(conn, "boards", ["id", "name"], board_rows, self.schema)
+                if user_rows:
+                    logger.info("Сохранение новых пользователей…")
+                    with metrics.timer("upsert_users"):
+                        users_touched = upsert_rows(conn, "users", ["id", "name"], user_rows, self.schema)
+
+                # 3. Задачи: поток страниц (или шарды по доскам), только окно window_days
+                logger.info("Загрузка и сохранение задач…")
+                _emit(progress, "tasks", boards=boards_touched, users=users_touched)
+                known_user_ids = {str(u["id"]) for u in users_api if u.get("id")}
+                sink = _TaskSink(self, conn, mode, mapper, known_user_ids, cursor_ts,
+                                 progress=progress, metrics=metrics)
+                if self.shards > 1:
+                    http = self._sync_shards(client, sink, progress, metrics)
+                else:
+                    # Задачи сжимаются в TaskRecord ещё в потоках загрузки
+                    pages = client.iter_tasks(mapper.project, columns=self._fetch_columns(mapper),
+                                              since=_window_start(self.window_days))
+                    for page in metrics.timed_iter("api_tasks", pages):
+                        sink.feed_records(page)
+                    http = {}
+                sink.close()
+                metrics.count("reference_cache_hits", len(refs.hits))
+                http = _sum_stats(client.stats(), http)
+                _log_http(http)
+
+            report = _report(mode, boards_touched, users_touched, sink, http, metrics)
+        finally:
+            pool.putconn(conn)
+
+        logger.info("✓ Импорт завершён!")
+        _emit(progress, "done", **report)
+        return report
+
+    def _fetch_columns(self, mapper: TaskMapper) -> list[str] | None:
+        """Колонки для загрузки по колонкам; None — общий поток task-list"""
+        return list(mapper.col_to_board) if self.fetch == "columns" else None
+
+    def _sync_shards(self, client: YougileClient, sink: _TaskSink, progress: Progress,
+                     metrics: SyncMetrics) -> dict:
+        """Задачи по шардам досок в пуле процессов; итоги шардов сливаются в ``sink``.
+
+        Возвращает суммарную HTTP-статистику шардов. Процессы запускаются
+        через spawn: родитель может быть многопоточным (веб-сервис).
+        """
+        shard_columns = _shard_columns(sink.mapper.col_to_board, self.shards)
+        logger.info(f"Шардов: {len(shard_columns)}, колонок: {sum(map(len, shard_columns))}")
+        if not shard_columns:
+            # Пустое пространство или все доски исключены: задач нет, пул не нужен
+            return {}
+        ctx = multiprocessing.get_context("spawn")
+        # Общий бюджет запросов: текущий темп лимитера токена делится между процессами
+        shared = SharedRateLimiter(client.limiter.rate, client.limiter.max_rate, ctx=ctx)
+        http: dict = {}
+        with metrics.timer("shards"), ProcessPoolExecutor(
+            max_workers=len(shard_columns), mp_context=ctx,
+            initializer=_init_shard_worker, initargs=(self.api_token, shared),
+        ) as pool:
+            futures = [
+                pool.submit(_run_shard, self, columns, sink.mapper, sink.mode, sink.cursor_ts,
+                            sink.known_user_ids)
+                for columns in shard_columns
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                sink.merge(result["counts"], result["max_task_ts"])
+                metrics.merge_phases(result["phases"])
+                http = _sum_stats(http, result["http"])
+                _emit(progress, "tasks", fetched=sink.fetched, in_window=sink.in_window,
+                      written=sink.touched, unchanged=sink.unchanged)
+        return http
+
+    async def run_async(self, progress: Progress | None = None, trigger: str = "manual") -> dict:
+        """То же, что run, но коллекции API загружаются одновременно.
+
+        Запись в БД начинается, как только готова нужная коллекция: доски и
+        пользователи API пишутся сразу, страницы задач — пачками по мере
+        загрузки. Вызовы psycopg2 выполняются в потоке и сериализуются, т.к.
+        соединение одно. Фазы здесь пересекаются, поэтому их сумма в метриках
+        может превышать общее время запуска. С шардами (``shards`` > 1)
+        параллелизм даёт пул процессов, и запуск идёт через run в потоке.
+        """
+        if self.shards > 1:
+            return await asyncio.to_thread(self.run, progress, trigger)
+        metrics = SyncMetrics()
+        guard = SyncRunGuard(self.pg_dsn, self.schema, trigger, metrics)
+        try:
+            await asyncio.to_thread(guard.__enter__)
+        except BaseException as e:
+            _observe(metrics, e)
+            raise
+        try:
+            report = await self._sync_async(_tee(guard.track, progress), metrics)
+        except BaseException as e:
+            await asyncio.to_thread(guard.__exit__, type(e), e, e.__traceback__)
+            _observe(metrics, e)
+            raise
+        guard.http = report["http"]
+        await asyncio.to_thread(guard.__exit__, None, None, None)
+        _observe(metrics, None)
+        return report
+
+    async def _sync_async(self, progress: Progress, metrics: SyncMetrics) -> dict:
+        db_lock = asyncio.Lock()
+        schema = self.schema
+
+        async def db(fn, *args):
+            async with db_lock:
+                return await asyncio.to_thread(fn, *args)
+
+        _emit(progress, "connect")
+        logger.info("Подключение к PostgreSQL…")
+        pool = get_pool(self.pg_dsn)
+        with metrics.timer("db_connect"):
+            conn = await asyncio.to_thread(pool.getconn)
+        try:
+            logger.info("Загрузка данных из API…")
+            async with AsyncYougileClient(self.api_token, **self.client_kwargs) as client:
+                # Общий поток: первые страницы задач загружаются сразу, остальные — по мере записи.
+                # По колонкам загрузка начинается, когда известна карта колонок
+                if self.fetch != "columns":
+                    task_pages = client.iter_tasks(since=_window_start(self.window_days))
+                    first_page_f = asyncio.create_task(metrics.timed("api_tasks", anext(task_pages, None)))
+
+                mode, cursor_ts = await db(self._plan, conn)
+                refs = ReferenceCache(await db(get_reference_cache, conn, schema), refresh=mode == "full")
+
+                async def reference(name: str) -> list:
+                    items = refs.fresh(name)
+                    if items is None:
+                        pages = await client.fetch_pages(*refs.request(name))
+                        await db(save_reference_cache, conn, name, pages, schema)
+                        items = refs.store(name, pages)
+                    return items
+
+                async def stickers() -> dict[str, tuple[str, str, str]]:
+                    responses = await asyncio.gather(reference("string-stickers"), reference("sprint-stickers"))
+                    return _sticker_states([data for items in responses for data in items])
+
+                boards_f = asyncio.create_task(metrics.timed("api_boards", reference("boards")))
+                users_f = asyncio.create_task(metrics.timed("api_users", reference("users")))
+                columns_f = asyncio.create_task(metrics.timed("api_columns", reference("columns")))
+                stickers_f = asyncio.create_task(metrics.timed("api_stickers", stickers()))
+
+                # Пока идут запросы — чистим окно
+                if mode == "full":
+                    await metrics.timed("purge", db(self._purge_window, conn))
+                _emit(progress, "reference", mode=mode)
+
+                async def load_boards() -> list[dict]:
+                    boards = await boards_f or []
+                    if "boards" in refs.hits and _missing_boards(await columns_f or [], boards):
+                        logger.info("Колонки ссылаются на доски не из кэша — обновляем доски")
+                        refs.expire("boards")
+                        boards = await metrics.timed("api_boards", reference("boards"))
+                    return boards
+
+                async def save_boards() -> tuple[int, list[dict]]:
+                    boards = await load_boards()
+                    existing = await metrics.timed("lookup", db(self._existing_ids, conn, "boards", boards))
+                    with metrics.timer("mapping"):
+                        board_rows = _board_rows(boards, existing)
+                    if not board_rows:
+                        return 0, boards
+                    logger.info("Сохранение новых досок…")
+                    touched = await metrics.timed(
+                        "upsert_boards", db(upsert_rows, conn, "boards", ["id", "name"], board_rows, schema)
+                    )
+                    return touched, boards
+
+                async def save_users() -> tuple[int, set[str]]:
+                    users_api = await users_f or []
+                    stored = await metrics.timed("lookup", db(self._stored_names, conn, "users", users_api))
+                    with metrics.timer("mapping"):
+                        user_rows = _api_user_rows(users_api, stored)
+                    touched = 0
+                    if user_rows:
+                        logger.info("Сохранение новых и переименованных пользователей…")
+                        touched = await metrics.timed(
+                            "upsert_users", db(upsert_rows, conn, "users", ["id", "name"], user_rows, schema)
+                        )
+                    return touched, {str(u["id"]) for u in users_api if u.get("id")}
+
+                async def save_tasks() -> _TaskSink:
+                    columns = await columns_f or []
+                    # Доски — после возможной перезагрузки в save_boards
+                    _, boards = await boards_saved
+                    sticker_states = await stickers_f
+                    logger.info(f"Стикеров загружено: {len(sticker_states)}")
+                    profiles = await metrics.timed("lookup", db(get_board_profiles, conn, schema))
+                    with metrics.timer("mapping"):
+                        mapper = TaskMapper(_col_to_board(columns, boards, self.exclude_boards,
+                                                          self.fetch == "columns"),
+                                            sticker_states, profiles)
+                    fetch_columns = self._fetch_columns(mapper)
+                    if fetch_columns is not None:
+                        pages = client.iter_tasks(mapper.project, columns=fetch_columns,
+                                                  since=_window_start(self.window_days))
+
+                    # Внешние ключи: доски и пользователи должны быть записаны раньше задач
+                    _, known_user_ids = await users_saved
+
+                    _emit(progress, "tasks")
+                    sink = _TaskSink(self, conn, mode, mapper, known_user_ids, cursor_ts,
+                                     progress=progress, metrics=metrics)
+                    if fetch_columns is not None:
+                        async for page in metrics.timed_aiter("api_tasks", pages):
+                            await db(sink.feed_records, page)
+                    else:
+                        page = await first_page_f
+                        if page is not None:
+                            await db(sink.feed, page)
+                            async for page in metrics.timed_aiter("api_tasks", task_pages):
+                                await db(sink.feed, page)
+                    await db(sink.close)
+                    metrics.count("reference_cache_hits", len(refs.hits))
+                    return sink
+
+                boards_saved = asyncio.create_task(save_boards())
+                users_saved = asyncio.create_task(save_users())
+                (boards_touched, _), (users_touched, _), sink = await asyncio.gather(
+                    boards_saved, users_saved, save_tasks()
+                )
+                http = client.stats()
+                _log_http(http)
+
+            report = _report(mode, boards_touched, users_touched, sink, http, metrics)
+        finally:
+            await asyncio.to_thread(pool.putconn, conn)
+
+        logger.info("✓ Импорт завершён!")
+        _emit(progress, "done", **report)
+        return report
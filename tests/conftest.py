@@ -0,0 +1,48 @@
+import os
+import uuid
+
+import pytest
+
+from benchmarks.fake_yougile import FakeYougile
+from benchmarks.workspace import Workspace
+
+# PostgreSQL для тестов синхронизации; без него они пропускаются
+TEST_DSN = os.getenv("TEST_DATABASE_URL") or os.getenv("DATABASE_URL", "")
+
+
+@pytest.fixture(scope="session")
+def pg_dsn():
+    if not TEST_DSN:
+        pytest.skip("TEST_DATABASE_URL не задан")
+    from db import connect
+    try:
+        connect(TEST_DSN).close()
+    except Exception as e:
+        pytest.skip(f"PostgreSQL недоступен: {e}")
+    return TEST_DSN
+
+
+@pytest.fixture
+def schema(pg_dsn):
+    """Одноразовая схема теста"""
+    from db import connect
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    yield name
+    conn = connect(pg_dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {name} CASCADE;")
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def workspace():
+    """Детерминированное пространство (seed): половина задач в окне 90 дней"""
+    return Workspace(400, boards=3, columns_per_board=3, users=20, history_days=180, payload=10)
+
+
+@pytest.fixture
+def fake_api(workspace):
+    with FakeYougile(workspace, latency=0, jitter=0) as api:
+        yield api
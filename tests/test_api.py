@@ -0,0 +1,99 @@
+import asyncio
+import time
+import uuid
+from collections.abc import Callable
+
+import pytest
+
+from yougile_api import RateLimiter, YougileClient
+from yougile_async import AsyncYougileClient
+
+PAGE_SIZE = 50
+
+
+def _client(api, cls=YougileClient, **kwargs):
+    """Клиент со своим токеном: лимитеры общие на токен и не должны делиться между тестами"""
+    kwargs.setdefault("requests_per_second", 10)
+    return cls(uuid.uuid4().hex, base_url=api.url, concurrency=4, **kwargs)
+
+
+async def _iter_async(client: AsyncYougileClient, endpoint: str) -> list:
+    try:
+        return [batch async for batch in client.iter_pages(endpoint, page_size=PAGE_SIZE)]
+    finally:
+        await client.close()
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_iter_pages_stops_at_short_page(workspace, fake_api, use_async):
+    # 400 задач по 50: восемь полных страниц и пустая девятая, запросов дальше неё быть не должно
+    before = fake_api.stats["requests"]
+    if use_async:
+        batches = asyncio.run(_iter_async(_client(fake_api, AsyncYougileClient), "task-list"))
+    else:
+        batches = list(_client(fake_api).iter_pages("task-list", page_size=PAGE_SIZE))
+    assert sum(map(len, batches)) == workspace.n_tasks
+    assert fake_api.stats["requests"] - before == workspace.n_tasks // PAGE_SIZE + 1
+
+
+def _script_throttling(api, script: list[bool], rate: Callable[[], float]) -> list[tuple[float, float]]:
+    """Подменить 429 фейка сценарием: i-й запрос получает 429, если script[i].
+
+    Возвращает журнал запросов: (время, темп лимитера клиента ``rate()`` в этот момент).
+    """
+    log = []
+
+    def throttled() -> bool:
+        log.append((time.monotonic(), rate()))
+        hit = len(log) <= len(script) and script[len(log) - 1]
+        if hit:
+            with api._lock:
+                api.stats["throttled"] += 1
+        return hit
+
+    api._throttled = throttled
+    return log
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_throttled_request_backs_off_and_recovers(workspace, fake_api, use_async):
+    fake_api.retry_after = 0.5
+    client = _client(fake_api, AsyncYougileClient if use_async else YougileClient)
+    log = _script_throttling(fake_api, [True], lambda: client.limiter.rate)
+    start_rate = client.limiter.rate
+    if use_async:
+        batches = asyncio.run(_iter_async(client, "task-list"))
+    else:
+        batches = list(client.iter_pages("task-list", page_size=PAGE_SIZE))
+    assert sum(map(len, batches)) == workspace.n_tasks
+
+    assert client.http_stats.throttled == fake_api.stats["throttled"] == 1
+    # Повтор не раньше Retry-After, к этому моменту темп уже снижен
+    (throttled_at, _), (retried_at, dropped_rate) = log[:2]
+    assert retried_at - throttled_at >= fake_api.retry_after
+    assert dropped_rate == pytest.approx(start_rate * client.limiter.decrease)
+    # После паузы успешные ответы снова поднимают темп
+    assert client.limiter.rate > dropped_rate
+
+
+def test_parallel_throttling_decreases_rate_once():
+    limiter = RateLimiter(8.0)
+    pauses = [limiter.on_throttled({"Retry-After": "0.2"}) for _ in range(4)]
+    assert pauses == [0.2] * 4
+    assert limiter.rate == 4.0
+    assert 0 < limiter.pause_remaining() <= 0.2
+
+
+def test_rate_limit_headers():
+    limiter = RateLimiter(8.0)
+    limiter.on_success({"X-RateLimit-Limit": "120", "RateLimit-Policy": "120;w=60"})
+    assert limiter.max_rate == 2.0
+    # Квота исчерпана: выдача токенов встаёт до сброса, темп не растёт
+    rate = limiter.rate
+    limiter.on_success({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.3"})
+    assert limiter.rate == rate
+    assert 0.2 < limiter.pause_remaining() <= 0.3
+    # Unix-время сброса тоже понимается
+    limiter = RateLimiter(8.0)
+    limiter.on_success({"RateLimit-Remaining": "0", "RateLimit-Reset": str(time.time() + 0.3)})
+    assert 0.2 < limiter.pause_remaining() <= 0.3
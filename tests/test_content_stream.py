@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from yougile_api import _ContentStream
+
+FIXTURE = {
+    "paging": {"count": 3, "limit": 1000, "offset": 0, "next": False},
+    "content": [
+        {"id": "task-1", "title": "Задача «один»", "createdAt": 1760000000123, "timeTracking": {"work": 12.5},
+         "assigned": ["user-1"], "stickers": {"s1": "state-1"}, "deleted": False, "color": None},
+        12.5,
+        -3e-7,
+        0,
+        True,
+        None,
+        "строка",
+        [1, 2.25, {"nested": [1e10, -0.0]}],
+    ],
+    "total": 1234567,
+}
+
+
+def _stream(raw: bytes, cuts: list[int]) -> list:
+    stream = _ContentStream()
+    items = []
+    start = 0
+    for cut in cuts:
+        items.extend(stream.feed(raw[start:cut]))
+        start = cut
+    items.extend(stream.feed(raw[start:]))
+    items.extend(stream.close())
+    return items
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_split_at_every_byte_offset(separators):
+    raw = json.dumps(FIXTURE, ensure_ascii=False, separators=separators).encode()
+    for cut in range(len(raw) + 1):
+        assert _stream(raw, [cut]) == FIXTURE["content"], f"разрез на байте {cut}"
+
+
+def test_byte_by_byte():
+    raw = json.dumps(FIXTURE, ensure_ascii=False).encode()
+    assert _stream(raw, list(range(1, len(raw)))) == FIXTURE["content"]
+
+
+def test_number_split_at_chunk_boundary():
+    stream = _ContentStream()
+    assert stream.feed(b'{"content": [12.') == []
+    assert stream.feed(b'5, 7') == [12.5]
+    assert stream.feed(b']}') == [7]
+    assert stream.close() == []
+
+
+def test_truncated_json_raises():
+    stream = _ContentStream()
+    stream.feed(b'{"content": [{"id": 1}, 12')
+    with pytest.raises(ValueError):
+        stream.close()
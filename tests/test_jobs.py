@@ -0,0 +1,30 @@
+import threading
+
+import jobs
+
+
+def test_job_snapshot_is_detached(monkeypatch):
+    reported, resume = threading.Event(), threading.Event()
+
+    async def run_sync(progress, trigger, mode):
+        progress("tasks", {"tasks": 1})
+        reported.set()
+        resume.wait(5)
+        progress("tasks", {"tasks": 2, "columns": 3})
+        return {"tasks": 2}
+
+    monkeypatch.setattr(jobs, "run_sync_once_async", run_sync)
+    sync_jobs = jobs.SyncJobs()
+    job, created = sync_jobs.submit(trigger="test")
+    assert created
+    assert reported.wait(5)
+    snapshot = sync_jobs.get(job["id"])
+    assert snapshot["counts"] == {"tasks": 1}
+
+    # Поток синхронизации меняет counts, а выданная копия — нет
+    resume.set()
+    sync_jobs._executor.shutdown(wait=True)
+    assert snapshot["counts"] == {"tasks": 1}
+    finished = sync_jobs.get(job["id"])
+    assert finished["status"] == "done"
+    assert finished["counts"] == {"tasks": 2, "columns": 3}
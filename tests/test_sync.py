@@ -0,0 +1,137 @@
+import asyncio
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from db import connect, ensure_schema, ensure_task_partitions, upsert_rows
+from sync_engine import SyncEngine
+
+WINDOW_DAYS = 90
+
+
+def _engine(pg_dsn: str, schema: str, api, mode: str, **kwargs) -> SyncEngine:
+    client_kwargs = dict(base_url=api.url, requests_per_second=1000, concurrency=4)
+    kwargs.setdefault("shards", 1)
+    return SyncEngine("test", pg_dsn, schema, mode=mode, window_days=WINDOW_DAYS,
+                      client_kwargs=client_kwargs, **kwargs)
+
+
+def _run(engine: SyncEngine, use_async: bool) -> dict:
+    return asyncio.run(engine.run_async(trigger="test")) if use_async else engine.run(trigger="test")
+
+
+def _query(pg_dsn: str, sql: str) -> list[tuple]:
+    conn = connect(pg_dsn)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(sql)
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def _tasks(pg_dsn: str, schema: str) -> dict[str, tuple]:
+    return {row[0]: row[1:] for row in _query(pg_dsn, f"SELECT id, title, created_at FROM {schema}.tasks;")}
+
+
+@pytest.mark.parametrize("fetch", ["stream", "columns"])
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_incremental_after_full_writes_nothing(pg_dsn, schema, fake_api, use_async, fetch):
+    full = _run(_engine(pg_dsn, schema, fake_api, "full", fetch=fetch), use_async)
+    stored = _tasks(pg_dsn, schema)
+    assert full["mode"] == "full"
+    assert full["tasks"] == len(stored) > 0
+
+    incremental = _run(_engine(pg_dsn, schema, fake_api, "incremental", fetch=fetch), use_async)
+    assert incremental["mode"] == "incremental"
+    assert incremental["tasks"] == 0
+    assert incremental["tasks_unchanged"] == len(stored)
+    assert _tasks(pg_dsn, schema) == stored
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_incremental_writes_only_changed_tasks(pg_dsn, schema, workspace, fake_api, use_async):
+    _run(_engine(pg_dsn, schema, fake_api, "full"), use_async)
+    newest = workspace.n_tasks - 1
+    task = workspace.task
+
+    def changed(i: int) -> dict:
+        return {**task(i), "title": "Переименована"} if i == newest else task(i)
+
+    workspace.task = changed
+    report = _run(_engine(pg_dsn, schema, fake_api, "incremental"), use_async)
+    assert report["tasks"] == 1
+    assert _tasks(pg_dsn, schema)[changed(newest)["id"]][0] == "Переименована"
+
+
+@pytest.mark.parametrize("partitioned", [False, True], ids=["plain", "partitioned"])
+def test_full_sync_purges_window(pg_dsn, schema, workspace, fake_api, partitioned):
+    conn = connect(pg_dsn)
+    try:
+        ensure_schema(conn, schema, partition_tasks=partitioned)
+    finally:
+        conn.close()
+    _run(_engine(pg_dsn, schema, fake_api, "full"), False)
+    board_id = workspace.boards[0]["id"]
+    inside = date.today() - timedelta(days=1)
+    outside = date.today() - timedelta(days=WINDOW_DAYS + 30)
+    conn = connect(pg_dsn)
+    try:
+        if partitioned:
+            ensure_task_partitions(conn, {inside, outside}, schema)
+        upsert_rows(conn, "tasks", ["id", "title", "board_id", "created_at"],
+                    [("gone", "Удалена в API", board_id, inside), ("old", "Старше окна", board_id, outside)],
+                    schema, conflict=("id", "created_at") if partitioned else ("id",))
+    finally:
+        conn.close()
+
+    # Инкрементальный режим окно не чистит
+    _run(_engine(pg_dsn, schema, fake_api, "incremental"), False)
+    assert {"gone", "old"} <= _tasks(pg_dsn, schema).keys()
+
+    report = _run(_engine(pg_dsn, schema, fake_api, "full"), False)
+    stored = _tasks(pg_dsn, schema)
+    assert "gone" not in stored
+    assert stored["old"] == ("Старше окна", outside)
+    assert report["tasks"] == len(stored) - 1
+
+
+@pytest.mark.parametrize("method", ["values", "copy"])
+def test_upsert_dedupes_repeated_keys(pg_dsn, schema, method):
+    conn = connect(pg_dsn)
+    try:
+        ensure_schema(conn, schema, partition_tasks=False)
+        rows = [("u1", "первая"), ("u2", "вторая"), ("u1", "последняя")]
+        assert upsert_rows(conn, "users", ["id", "name"], rows, schema, method=method) == 2
+        assert upsert_rows(conn, "users", ["id", "name"], [("u2", "обновлена")], schema, method=method) == 1
+    finally:
+        conn.close()
+    assert sorted(_query(pg_dsn, f"SELECT id, name FROM {schema}.users;")) == [("u1", "последняя"), ("u2", "обновлена")]
+
+
+def test_shards_without_columns(pg_dsn, schema, workspace, fake_api):
+    exclude = frozenset(board["id"] for board in workspace.boards)
+    report = _run(_engine(pg_dsn, schema, fake_api, "full", exclude_boards=exclude, shards=2), False)
+    assert report["tasks"] == 0
+    assert _tasks(pg_dsn, schema) == {}
+
+
+@pytest.mark.parametrize("fetch", ["stream", "columns"])
+def test_archived_board_tasks(pg_dsn, schema, workspace, fake_api, fetch):
+    archived = workspace.boards[1]["id"]
+    workspace.boards[1]["archived"] = True
+    archived_columns = {column["id"] for column in workspace.columns if column["boardId"] == archived}
+    expected = _run(_engine(pg_dsn, schema, fake_api, "full"), False)["tasks"]
+
+    # Полный запуск чистит окно: задачи архивной доски должны вернуться в потоке task-list
+    report = _run(_engine(pg_dsn, schema, fake_api, "full", fetch=fetch), False)
+    on_archived = _query(pg_dsn, f"SELECT id FROM {schema}.tasks WHERE board_id = '{archived}';")
+    in_window = sum(1 for t in workspace.iter_tasks() if t["columnId"] in archived_columns
+                    and t["timestamp"] / 1000 >= time.time() - WINDOW_DAYS * 86400)
+    if fetch == "stream":
+        assert report["tasks"] == expected
+        assert len(on_archived) == in_window > 0
+    else:
+        assert report["tasks"] == expected - in_window
+        assert on_archived == []
@@ -1,61 +1,788 @@
+import codecs
+import json
+import logging
+import multiprocessing
+import re
 import requests
+import threading
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from urllib.parse import urljoin
-from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from tenacity import (retry, wait_exponential, stop_after_attempt,
+                      retry_if_exception_type, retry_if_not_exception_type)
 import time
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 API_BASE = "https://ru.yougile.com/api-v2/"
 
+# YouGile допускает ~50 запросов в минуту на компанию
+DEFAULT_REQUESTS_PER_SECOND = 50 / 60
+DEFAULT_CONCURRENCY = 4
+DEFAULT_POOL_SIZE = 8
+MAX_THROTTLED_RETRIES = 20
+PAGE_SIZE = 200
+# Больше limit API не отдаёт
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 64 * 1024
+STICKER_ENDPOINTS = ("string-stickers", "sprint-stickers")
+# Порядок task-list по дате создания: от старых к новым или наоборот
+TASK_ORDERS = ("asc", "desc")
+# Пропуск страниц вне окна ищется, только если их не меньше стольких: на коротких списках пробы дороже
+SKIP_MIN_PAGES = 4
+# Сколько раз колонка ставится в очередь заново, если её страница не загрузилась и после повторов запроса
+COLUMN_ATTEMPTS = 3
+
 class YougileError(Exception):
     pass
 
+class RateLimitError(YougileError):
+    pass
+
+class _Skipped(Exception):
+    """Запрос снят после ожидания лимитера (страница уже не нужна); не повторяется"""
+
 def _auth_headers(api_bearer_token: str) -> dict:
     return {
         "Authorization": f"Bearer {api_bearer_token}",
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
+        "Accept-Encoding": "gzip, deflate",
     }
 
-@retry(wait=wait_exponential(multiplier=2, min=2, max=60),
-       stop=stop_after_attempt(10),
-       retry=retry_if_exception_type((requests.RequestException, YougileError)))
-def _get(url: str, headers: dict, params: dict | None = None) -> dict | None:
-    r = requests.get(url, headers=headers, params=params, timeout=30)
-    if r.status_code == 429:
-        raise YougileError("Rate limited (429). Retrying...")
-    if r.status_code == 401:
-        raise YougileError("Unauthorized. Проверьте Bearer-токен.")
-    if r.status_code == 404:
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After: число секунд или HTTP-дата"""
+    if not value:
         return None
-    if not r.ok:
-        raise YougileError(f"HTTP {r.status_code}: {r.text[:200]}")
-    return r.json()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+def _header_float(headers, *names: str) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value.split(",")[0].split(";")[0])
+        except ValueError:
+            continue
+    return None
+
+class RateLimiter:
+    """Адаптивный token bucket для одного API-токена.
+
+    Темп ``rate`` (запросов/с) плавно растёт на ``increase`` после каждого
+    успешного ответа (до ``max_rate``) и умножается на ``decrease`` при 429.
+    Retry-After и заголовки X-RateLimit-* / RateLimit-* приостанавливают
+    выдачу токенов до сброса квоты, а объявленный лимит ограничивает ``max_rate``.
+    """
+
+    def __init__(self, rate: float, max_rate: float | None = None, min_rate: float = 0.05,
+                 burst: float = 1.0, increase: float = 0.02, decrease: float = 0.5):
+        self.rate = rate
+        self.max_rate = max_rate or rate * 2
+        self.min_rate = min_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Забронировать токен, вернуть сколько секунд нужно подождать"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            ready = self._updated + max(0.0, -self._tokens) / self.rate
+            return max(0.0, ready - now, self._paused_until - now)
+
+    def pause_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+    def refund(self):
+        """Вернуть токен запроса, который после ожидания решили не отправлять"""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        # Пауза могла начаться, пока мы ждали свою очередь
+        pause = self.pause_remaining()
+        if pause > 0:
+            time.sleep(pause)
+
+    def _pause(self, now: float, seconds: float):
+        until = now + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+            self._updated = max(self._updated, until)
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_throttled(self, headers=None) -> float:
+        """Ответ 429: снизить темп и выдержать паузу. Возвращает длительность паузы."""
+        headers = headers or {}
+        retry_after = _parse_retry_after(headers.get("Retry-After"))
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Одна серия 429 от параллельных запросов снижает темп один раз
+            if now >= self._cooldown_until:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._pause(now, pause)
+            self._cooldown_until = max(self._cooldown_until, now + pause + 1.0 / self.rate)
+            return pause
+
+    def on_success(self, headers=None):
+        headers = headers or {}
+        limit = _header_float(headers, "X-RateLimit-Limit", "RateLimit-Limit")
+        remaining = _header_float(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        window = None
+        policy = headers.get("RateLimit-Policy") or ""
+        if "w=" in policy:
+            try:
+                window = float(policy.split("w=")[1].split(";")[0].split(",")[0])
+            except ValueError:
+                window = None
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if limit and window:
+                # Объявленная квота — потолок темпа
+                self.max_rate = limit / window
+            if remaining is not None and remaining < 1 and reset is not None:
+                # reset — секунды до сброса либо unix-время
+                seconds = reset - time.time() if reset > 1e9 else reset
+                self._pause(now, max(0.0, seconds))
+                return
+            if now >= self._cooldown_until:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+
+def _shared(index: int) -> property:
+    return property(lambda self: self._state[index],
+                    lambda self, value: self._state.__setitem__(index, value))
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter с состоянием в общей памяти: один бюджет на несколько процессов.
+
+    Создаётся в родителе до запуска пула процессов (``ctx`` — его контекст
+    multiprocessing) и передаётся воркерам через initializer, где
+    регистрируется install_rate_limiter. time.monotonic() общий для
+    процессов одной машины.
+    """
+
+    rate = _shared(0)
+    max_rate = _shared(1)
+    _tokens = _shared(2)
+    _updated = _shared(3)
+    _paused_until = _shared(4)
+    _cooldown_until = _shared(5)
+
+    def __init__(self, rate: float, max_rate: float | None = None, ctx=multiprocessing, **kwargs):
+        self._state = ctx.Array("d", 6)
+        super().__init__(rate, max_rate=max_rate, **kwargs)
+        self._lock = self._state.get_lock()
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def install_rate_limiter(api_bearer_token: str, limiter: RateLimiter):
+    """Подменить лимитер токена (например, общим SharedRateLimiter в процессе-воркере)"""
+    with _limiters_lock:
+        _limiters[api_bearer_token] = limiter
+
+def get_rate_limiter(api_bearer_token: str, rate: float, max_rate: float | None = None) -> RateLimiter:
+    """Один лимитер на токен: все клиенты с тем же токеном делят квоту"""
+    with _limiters_lock:
+        limiter = _limiters.get(api_bearer_token)
+        if limiter is None:
+            limiter = _limiters[api_bearer_token] = RateLimiter(rate, max_rate=max_rate)
+        return limiter
+
+class HttpStats:
+    """Счётчики HTTP-трафика клиента (потокобезопасные)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.connections_opened = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+
+    def add(self, **counters: int):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "not_modified": self.not_modified,
+                "connections_opened": self.connections_opened,
+                "connections_reused": max(0, self.requests - self.connections_opened),
+                "bytes_received": self.bytes_received,
+                "bytes_decoded": self.bytes_decoded,
+            }
+
+
+def _count_retry(retry_state):
+    """before_sleep для tenacity: учесть повтор запроса в HttpStats клиента"""
+    retry_state.args[0].http_stats.add(retries=1)
+
+
+def _conditional_headers(cached: dict | None) -> dict:
+    """If-None-Match / If-Modified-Since по валидаторам сохранённой страницы"""
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def _cache_page(content, headers) -> dict:
+    """Страница для кэша справочников: содержимое и валидаторы ответа"""
+    return {"content": content, "etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified")}
+
+
+def _collect_sticker_states(data: dict | None, states_map: dict[str, tuple[str, str, str]]):
+    """Разобрать ответ string-stickers / sprint-stickers в {state_id: (name, parent_id, parent_name)}"""
+    if data and "content" in data:
+        for group in data["content"]:
+            if isinstance(group, dict):
+                parent_id = str(group.get("id", ""))
+                parent_name = str(group.get("name", ""))
+                for state in group.get("states", []):
+                    if "id" in state and "name" in state:
+                        state_id = str(state["id"])
+                        state_name = str(state["name"])
+                        states_map[state_id] = (state_name, parent_id, parent_name)
+
+def loads(data: bytes | str):
+    """json.loads; orjson, если установлен"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_decoder = json.JSONDecoder()
+
+# Состояния _ContentStream
+_OBJECT, _KEY, _COLON, _VALUE, _NEXT, _ITEMS, _FIRST_ITEM, _ITEM, _NEXT_ITEM, _END = range(10)
+
+def _truncated(buf: str, value, end: int) -> bool:
+    """Значение могло быть обрезано концом буфера: литерал или число до конца, ``[12.`` | ``5]``"""
+    if end == len(buf):
+        return True
+    return value.__class__ in (int, float) and _NUMBER_TAIL.match(buf, end).end() == len(buf)
+
+
+class _ContentStream:
+    """Потоковый разбор ответа ``{..., "content": [...]}`` на stdlib json.
+
+    ``feed(bytes)`` возвращает элементы ``content``, целиком пришедшие к
+    этому моменту; остальные поля верхнего уровня разбираются и
+    отбрасываются. Каждый элемент декодирует C-сканер json (raw_decode),
+    в памяти держится только недоразобранный хвост.
+    """
+
+    def __init__(self, key: str = "content"):
+        self.key = key
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = _OBJECT
+        self._name = None
+
+    def _decode(self, final: bool):
+        """Значение с текущей позиции; None — нужно больше данных"""
+        try:
+            value, end = _decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return None
+        if not final and _truncated(self._buf, value, end):
+            return None
+        self._pos = end
+        return (value,)
+
+    def _expect(self, char: str, *allowed: str):
+        if char not in allowed:
+            raise ValueError(f"ожидалось {' или '.join(allowed)}, получено {char!r} (позиция {self._pos})")
+        self._pos += 1
+
+    def _parse(self, final: bool) -> list:
+        items = []
+        buf = self._buf
+        while True:
+            self._pos = _WHITESPACE.match(buf, self._pos).end()
+            if self._pos >= len(buf):
+                break
+            char = buf[self._pos]
+            state = self._state
+            if state == _OBJECT:
+                self._expect(char, "{")
+                self._state = _KEY
+            elif state == _KEY:
+                if char == "}":
+                    self._pos += 1
+                    self._state = _END
+                    continue
+                decoded = self._decode(final)
+                if decoded is None:
+                    break
+                self._name = decoded[0]
+                self._state = _COLON
+            elif state == _COLON:
+                self._expect(char, ":")
+                self._state = _ITEMS if self._name == self.key else _VALUE
+            elif state == _VALUE:
+                if self._decode(final) is None:
+                    break
+                self._state = _NEXT
+            elif state == _NEXT:
+                self._expect(char, ",", "}")
+                self._state = _KEY if char == "," else _END
+            elif state == _ITEMS:
+                if char == "[":
+                    self._pos += 1
+                    self._state = _FIRST_ITEM
+                else:
+                    # content не список (null) — обычное значение
+                    self._state = _VALUE
+            elif state == _FIRST_ITEM:
+                if char == "]":
+                    self._pos += 1
+                    self._state = _NEXT
+                else:
+                    self._state = _ITEM
+            elif state == _ITEM:
+                # Горячий цикл: элементы подряд без возврата в общий автомат
+                pos = self._pos
+                end_of_buf = len(buf)
+                while True:
+                    try:
+                        value, end = _decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if final:
+                            raise
+                        break
+                    if not final and (end == end_of_buf or value.__class__ in (int, float)
+                                      and _truncated(buf, value, end)):
+                        break
+                    items.append(value)
+                    pos = _WHITESPACE.match(buf, end).end()
+                    if pos < end_of_buf and buf[pos] == ",":
+                        pos = _WHITESPACE.match(buf, pos + 1).end()
+                        continue
+                    self._state = _NEXT_ITEM
+                    break
+                self._pos = pos
+                if self._state == _ITEM:
+                    break
+            elif state == _NEXT_ITEM:
+                self._expect(char, ",", "]")
+                self._state = _ITEM if char == "," else _NEXT
+            else:
+                raise ValueError(f"лишние данные после JSON (позиция {self._pos})")
+        return items
+
+    def feed(self, chunk: bytes) -> list:
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """Конец тела: оставшиеся элементы; ValueError, если JSON оборван"""
+        self._buf = self._buf[self._pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        items = self._parse(final=True)
+        if self._state != _END:
+            raise ValueError("JSON оборван")
+        return items
+
+def _created_seconds(v) -> float | None:
+    """Время создания задачи (мс, секунды или ISO строка) в секундах эпохи"""
+    if isinstance(v, (int, float)):
+        return v / 1000.0 if v > 100000000000 else float(v)
+    if isinstance(v, str):
+        try:
+            return datetime.fromisoformat(v.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+def _task_seconds(t: dict) -> float | None:
+    return _created_seconds(t.get("createdAt") or t.get("timestamp"))
+
+def _board_columns(columns: list[dict]) -> dict[str, list[tuple[str, bool]]]:
+    """{board_id: [(column_id, deleted)]} из ответа /columns"""
+    board_columns = {}
+    for column in columns:
+        board_columns.setdefault(str(column.get("boardId")), []).append((str(column["id"]), bool(column.get("deleted"))))
+    return board_columns
+
+def _task_params(column_id: str | None, include_deleted: bool) -> dict:
+    """Фильтры task-list, которые понимает API"""
+    params = {}
+    if column_id:
+        params["columnId"] = column_id
+    if include_deleted:
+        params["includeDeleted"] = "true"
+    return params
+
+# Метки задач вне окна _TaskWindow: старше since, не младше until, без даты создания
+_OLDER, _NEWER, _UNDATED = object(), object(), object()
+
+class _TaskWindow:
+    """Фильтр task-list по дате создания [since, until) и полям на стороне клиента"""
+
+    def __init__(self, since: float | None = None, until: float | None = None, order: str | None = None,
+                 fields: tuple[str, ...] | None = None, transform: Callable | None = None):
+        self.since = since
+        self.until = until
+        self.order = order if since is not None or until is not None else None
+        self.fields = fields
+        self.transform = transform
+        self._trailing = _NEWER if order == "asc" else _OLDER
+
+    @property
+    def active(self) -> bool:
+        return self.since is not None or self.until is not None or bool(self.fields)
+
+    def leading(self, ts: float) -> bool:
+        if self.order == "asc":
+            return self.since is not None and ts < self.since
+        if self.order == "desc":
+            return self.until is not None and ts >= self.until
+        return False
+
+    def item(self, t: dict):
+        if self.since is not None or self.until is not None:
+            ts = _task_seconds(t)
+            if ts is None:
+                return _UNDATED
+            if self.since is not None and ts < self.since:
+                return _OLDER
+            if self.until is not None and ts >= self.until:
+                return _NEWER
+        if self.fields:
+            t = {name: t[name] for name in self.fields if name in t}
+        return self.transform(t) if self.transform is not None else t
+
+    def page(self, page: list) -> tuple[list, bool]:
+        """(задачи страницы в окне, страница целиком за окном — дальше только более поздние/ранние)"""
+        done = self.order is not None and bool(page) and all(x is self._trailing for x in page)
+        return [x for x in page if x is not _OLDER and x is not _NEWER and x is not _UNDATED], done
+
+def _counting_pool(base: type, stats: HttpStats) -> type:
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.add(connections_opened=1)
+            return super()._new_conn()
+    return CountingPool
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter, считающий новые TCP/TLS-соединения в пуле"""
+
+    def __init__(self, stats: HttpStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.stats),
+            "https": _counting_pool(HTTPSConnectionPool, self.stats),
+        }
+
+def _make_session(headers: dict, pool_size: int, stats: HttpStats) -> requests.Session:
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = _CountingAdapter(stats, pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 class YougileClient:
-    def __init__(self, api_bearer_token: str):
-        self.base_url = API_BASE
+    def __init__(self, api_bearer_token: str,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 max_requests_per_second: float | None = None,
+                 base_url: str = API_BASE,
+                 page_size: int = PAGE_SIZE,
+                 stream_json: bool = False,
+                 task_order: str | None = None):
+        self.base_url = base_url
         self.headers = _auth_headers(api_bearer_token)
+        self.concurrency = max(1, concurrency)
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        # Страницы task-list разбираются по мере прихода байт (_ContentStream)
+        self.stream_json = stream_json
+        if task_order and task_order not in TASK_ORDERS:
+            raise ValueError(f"task_order: {task_order!r}, ожидается одно из {TASK_ORDERS}")
+        # Известный порядок task-list позволяет не загружать страницы вне окна дат
+        self.task_order = task_order or None
+        self.limiter = get_rate_limiter(api_bearer_token, requests_per_second, max_requests_per_second)
+        self.http_stats = HttpStats()
+        # Колонки досок для iter_tasks(board_id=...): /columns запрашивается один раз на клиента
+        self._board_columns: dict[str, list[tuple[str, bool]]] | None = None
+        # Пул не меньше числа параллельных запросов, иначе соединения будут закрываться
+        self.session = _make_session(self.headers, max(pool_size, self.concurrency), self.http_stats)
 
-    def _list_paginated(self, endpoint: str) -> list[dict]:
-        """Получить список с пагинацией, обработка 429 с задержками"""
-        items = []
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> dict:
+        """Счётчики соединений и трафика: opened / reused / bytes"""
+        return self.http_stats.snapshot()
+
+    def _request(self, endpoint: str, params: dict | None = None,
+                 headers: dict | None = None, stream: bool = False,
+                 skip: Callable[[], bool] | None = None) -> requests.Response:
+        """Ответ API с проверкой статуса; 404 и 304 возвращаются как есть.
+
+        С ``stream`` тело успешного ответа не читается — его читает и
+        учитывает в bytes_* вызывающий. Если после ожидания лимитера
+        ``skip()`` истинно, токен возвращается и поднимается _Skipped.
+        """
+        url = urljoin(self.base_url, endpoint)
+        for _ in range(MAX_THROTTLED_RETRIES):
+            self.limiter.acquire()
+            if skip is not None and skip():
+                self.limiter.refund()
+                raise _Skipped(endpoint)
+            r = self.session.get(url, params=params, headers=headers, timeout=30, stream=stream)
+            if stream and r.ok:
+                self.http_stats.add(requests=1)
+                break
+            body = r.content
+            # raw.tell() — байты по сети (до распаковки gzip/deflate)
+            self.http_stats.add(requests=1, bytes_received=r.raw.tell() or len(body), bytes_decoded=len(body))
+            if r.status_code != 429:
+                break
+            self.http_stats.add(throttled=1)
+            self.limiter.on_throttled(r.headers)
+        else:
+            raise RateLimitError(f"Rate limited (429) {MAX_THROTTLED_RETRIES} раз подряд: {endpoint}")
+        if r.ok:
+            self.limiter.on_success(r.headers)
+        if r.status_code == 401:
+            raise YougileError("Unauthorized. Проверьте Bearer-токен.")
+        if not r.ok and r.status_code != 404:
+            raise YougileError(f"HTTP {r.status_code}: {r.text[:200]}")
+        return r
+
+    # 429 обрабатывает лимитер; tenacity повторяет только сетевые сбои и ошибки сервера
+    @retry(wait=wait_exponential(multiplier=2, min=2, max=60),
+           stop=stop_after_attempt(10),
+           retry=(retry_if_exception_type((requests.RequestException, YougileError))
+                  & retry_if_not_exception_type(RateLimitError)),
+           before_sleep=_count_retry)
+    def _get_response(self, endpoint: str, params: dict | None = None,
+                      headers: dict | None = None, skip: Callable[[], bool] | None = None) -> requests.Response:
+        return self._request(endpoint, params, headers, skip=skip)
+
+    def _get(self, endpoint: str, params: dict | None = None,
+             skip: Callable[[], bool] | None = None) -> dict | None:
+        r = self._get_response(endpoint, params, skip=skip)
+        if r.status_code == 404:
+            return None
+        return loads(r.content)
+
+    def _stream_content(self, r: requests.Response, endpoint: str) -> Iterator:
+        """Элементы content по мере прихода байт; оборванный или битый JSON — YougileError"""
+        stream = _ContentStream()
+        decoded = 0
+        try:
+            for chunk in r.iter_content(STREAM_CHUNK_SIZE):
+                decoded += len(chunk)
+                try:
+                    items = stream.feed(chunk)
+                except ValueError as e:
+                    raise YougileError(f"Некорректный JSON {endpoint}: {e}") from e
+                yield from items
+            try:
+                items = stream.close()
+            except ValueError as e:
+                raise YougileError(f"Некорректный JSON {endpoint}: {e}") from e
+            yield from items
+        finally:
+            self.http_stats.add(bytes_received=r.raw.tell() or decoded, bytes_decoded=decoded)
+            r.close()
+
+    # Как _get_response, но повтор охватывает и чтение тела: обрыв посреди страницы перезапрашивает её
+    @retry(wait=wait_exponential(multiplier=2, min=2, max=60),
+           stop=stop_after_attempt(10),
+           retry=(retry_if_exception_type((requests.RequestException, YougileError))
+                  & retry_if_not_exception_type(RateLimitError)),
+           before_sleep=_count_retry)
+    def _get_items(self, endpoint: str, params: dict | None = None,
+                   transform: Callable | None = None, skip: Callable[[], bool] | None = None) -> list:
+        """content ответа потоковым разбором; ``transform`` применяется к каждому элементу сразу"""
+        r = self._request(endpoint, params, stream=True, skip=skip)
+        if r.status_code == 404:
+            return []
+        items = self._stream_content(r, endpoint)
+        return list(items if transform is None else map(transform, items))
+
+    def fetch_pages(self, endpoint: str, cached_pages: list[dict] | None = None,
+                    paginated: bool = True, page_size: int | None = None) -> list[dict]:
+        """Страницы справочника для кэша: [{"content", "etag", "last_modified"}].
+
+        Для каждой страницы из ``cached_pages`` запрос условный (ETag /
+        Last-Modified); на 304 берётся сохранённое содержимое. Страницы
+        загружаются последовательно — справочники обычно умещаются в одну.
+        Без ``paginated`` эндпоинт запрашивается целиком одной «страницей».
+        """
+        page_size = page_size or self.page_size
+        pages = []
         page = 0
-        page_size = 200
-        
         while True:
-            params = {"offset": page * page_size, "limit": page_size}
-            try:
-                data = _get(urljoin(self.base_url, endpoint), self.headers, params=params)
-                if not data:
-                    break
-                batch = data.get("content", [])
-                items.extend(batch)
+            cached = cached_pages[page] if cached_pages and page < len(cached_pages) else None
+            params = {"offset": page * page_size, "limit": page_size} if paginated else None
+            r = self._get_response(endpoint, params, _conditional_headers(cached))
+            if r.status_code == 304 and cached is not None:
+                self.http_stats.add(not_modified=1)
+                pages.append(cached)
+            else:
+                data = loads(r.content) if r.status_code != 404 else None
+                content = (data or {}).get("content", []) if paginated else data
+                pages.append(_cache_page(content, r.headers))
+            content = pages[-1]["content"]
+            if not paginated or len(content or []) < page_size:
+                return pages
+            page += 1
+
+    def _fetch_page(self, endpoint: str, page: int, page_size: int,
+                    params: dict | None = None, transform: Callable | None = None,
+                    skip: Callable[[], bool] | None = None) -> list:
+        """Страница списка; снятый через ``skip`` запрос даёт пустую страницу"""
+        params = {**(params or {}), "offset": page * page_size, "limit": page_size}
+        try:
+            if self.stream_json:
+                return self._get_items(endpoint, params, transform, skip=skip)
+            data = self._get(endpoint, params=params, skip=skip)
+        except _Skipped:
+            return []
+        except Exception as e:
+            logger.warning(f"Ошибка загрузки {endpoint}, страница {page}: {e}")
+            raise
+        if not data:
+            return []
+        content = data.get("content", [])
+        return content if transform is None else list(map(transform, content))
+
+    def iter_pages(self, endpoint: str, page_size: int | None = None,
+                   params: dict | None = None, transform: Callable | None = None,
+                   first_page: int = 0) -> Iterator[list]:
+        """Страницы списка в порядке offset по мере загрузки.
+
+        Страницы запрашиваются параллельно (до ``concurrency`` одновременно) в
+        пределах лимита запросов токена, вперёд забегает не больше
+        ``concurrency`` страниц — память не зависит от размера списка.
+        Загрузка останавливается на первой неполной странице. ``params`` —
+        фильтры запроса (например, columnId). ``transform`` применяется к
+        каждому элементу в потоке загрузки (с ``stream_json`` — сразу по
+        разбору) и должен возвращать значение для каждого, хотя бы None:
+        конец списка определяется по длине страницы. ``first_page`` —
+        номер первой загружаемой страницы.
+        """
+        page_size = page_size or self.page_size
+        if self.concurrency == 1:
+            page = first_page
+            while True:
+                batch = self._fetch_page(endpoint, page, page_size, params, transform)
+                if batch:
+                    yield batch
                 if len(batch) < page_size:
-                    break
-                time.sleep(0.5)  # Пауза между запросами
+                    return
                 page += 1
-            except Exception as e:
-                print(f"Error fetching {endpoint} page {page}: {e}")
-                raise
-        
+
+        # Номера полученных неполных страниц: страницы дальше них не ставятся в работу, а уже
+        # ждущие в лимитере снимаются с возвратом токена — future.cancel() их не остановит
+        short_pages = []
+        stopped = False
+
+        def past_end(n: int) -> bool:
+            return stopped or bool(short_pages) and n > min(short_pages)
+
+        def fetch(n: int) -> list:
+            batch = self._fetch_page(endpoint, n, page_size, params, transform, skip=lambda: past_end(n))
+            if len(batch) < page_size:
+                short_pages.append(n)
+            return batch
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = {}
+            next_page = first_page
+            page = first_page
+            try:
+                while True:
+                    # Держим в работе окно из ``concurrency`` страниц вперёд
+                    while len(pending) < self.concurrency and not past_end(next_page):
+                        pending[next_page] = pool.submit(fetch, next_page)
+                        next_page += 1
+                    batch = pending.pop(page).result()
+                    if batch:
+                        yield batch
+                    if len(batch) < page_size:
+                        return
+                    page += 1
+            finally:
+                # Последняя страница (или потребитель остановился): забегающие вперёд запросы не нужны
+                stopped = True
+                for future in pending.values():
+                    future.cancel()
+
+    def _list_paginated(self, endpoint: str, page_size: int | None = None) -> list[dict]:
+        """Получить весь список с пагинацией"""
+        items = []
+        for batch in self.iter_pages(endpoint, page_size):
+            items.extend(batch)
         return items
 
     def list_boards(self) -> list[dict]:
@@ -67,23 +794,137 @@ class YougileClient:
     def list_columns(self) -> list[dict]:
         return self._list_paginated("columns")
 
-    def list_tasks(self) -> list[dict]:
-        return self._list_paginated("task-list")
+    def board_columns(self, board_id: str, include_deleted: bool = False) -> list[str]:
+        """Id колонок доски (удалённые — только с ``include_deleted``)"""
+        if self._board_columns is None:
+            self._board_columns = _board_columns(self.list_columns())
+        return [column_id for column_id, deleted in self._board_columns.get(board_id, ())
+                if include_deleted or not deleted]
+
+    def _probe_leading(self, params: dict, offset: int, window: _TaskWindow) -> bool:
+        """Задача task-list с номером ``offset`` есть и лежит до окна"""
+        data = self._get("task-list", params={**params, "offset": offset, "limit": 1})
+        content = (data or {}).get("content") or []
+        ts = _task_seconds(content[0]) if content else None
+        return ts is not None and window.leading(ts)
+
+    def _skip_pages(self, params: dict, page_size: int, window: _TaskWindow) -> int:
+        """Сколько начальных страниц task-list целиком лежат до окна.
+
+        Двоичный поиск пробами limit=1 по первым задачам страниц: O(log N)
+        маленьких запросов вместо загрузки всей истории; короче
+        SKIP_MIN_PAGES страниц — одна проба. Одна страница оставляется про
+        запас — порядок по дате может быть неточным.
+        """
+        if not self._probe_leading(params, SKIP_MIN_PAGES * page_size, window):
+            return 0
+        low, high = SKIP_MIN_PAGES, SKIP_MIN_PAGES * 2
+        while self._probe_leading(params, high * page_size, window):
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if self._probe_leading(params, mid * page_size, window):
+                low = mid
+            else:
+                high = mid
+        return low - 1
+
+    def _iter_task_pages(self, params: dict, window: _TaskWindow) -> Iterator[list]:
+        if not window.active:
+            yield from self.iter_pages("task-list", params=params, transform=window.transform)
+            return
+        first_page = self._skip_pages(params, self.page_size, window) if window.order else 0
+        for page in self.iter_pages("task-list", params=params, transform=window.item, first_page=first_page):
+            items, done = window.page(page)
+            if items:
+                yield items
+            if done:
+                return
+
+    def _fetch_column_page(self, column_id: str, page: int | None, window: _TaskWindow,
+                           include_deleted: bool) -> tuple[int, list]:
+        """(номер, страница) задач колонки; ``page`` None — первая страница окна"""
+        params = _task_params(column_id, include_deleted)
+        if page is None:
+            page = self._skip_pages(params, self.page_size, window) if window.order else 0
+        transform = window.item if window.active else window.transform
+        return page, self._fetch_page("task-list", page, self.page_size, params, transform)
+
+    def _iter_columns(self, columns: list[str], window: _TaskWindow, include_deleted: bool) -> Iterator[list]:
+        """Задачи колонок параллельно, в порядке готовности страниц.
+
+        В работе до ``concurrency`` колонок, у каждой по одной странице:
+        следующая запрашивается, когда предыдущая оказалась полной, и
+        встаёт в начало очереди. Колонка, страница которой не загрузилась и
+        после повторов запроса, ставится в конец очереди с той же страницы
+        (до COLUMN_ATTEMPTS раз) — уже загруженное не перезапрашивается.
+        """
+        # (колонка, страница — None, если колонка ещё не начата, попытка)
+        queue = deque((column_id, None, 1) for column_id in columns)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            running = {}
+            try:
+                while queue or running:
+                    while queue and len(running) < self.concurrency:
+                        column_id, page, attempt = queue.popleft()
+                        future = pool.submit(self._fetch_column_page, column_id, page, window, include_deleted)
+                        running[future] = (column_id, page, attempt)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        column_id, page, attempt = running.pop(future)
+                        try:
+                            page, batch = future.result()
+                        except Exception as e:
+                            if attempt >= COLUMN_ATTEMPTS:
+                                raise
+                            logger.warning(f"Колонка {column_id}: {e}; повтор {attempt}/{COLUMN_ATTEMPTS - 1}")
+                            queue.append((column_id, page, attempt + 1))
+                            continue
+                        items, stop = window.page(batch) if window.active else (batch, False)
+                        if len(batch) == self.page_size and not stop:
+                            queue.appendleft((column_id, page + 1, 1))
+                        if items:
+                            yield items
+            finally:
+                for future in running:
+                    future.cancel()
+
+    def iter_tasks(self, transform: Callable | None = None, *, column_id: str | None = None,
+                   columns: list[str] | None = None, board_id: str | None = None,
+                   since: float | None = None, until: float | None = None,
+                   include_deleted: bool = False, fields: tuple[str, ...] | None = None) -> Iterator[list]:
+        """Страницы задач с фильтрами.
+
+        ``column_id`` и ``include_deleted`` уходят в запрос. ``columns``
+        (список колонок) и ``board_id`` (колонки доски, board_columns)
+        загружаются параллельно по колонкам (_iter_columns): задачи других
+        колонок не скачиваются вовсе; ``column_id`` с ними не сочетается
+        (ValueError). ``since`` / ``until`` (секунды эпохи) и ``fields``
+        применяются на клиенте (см. _TaskWindow); при известном
+        ``task_order`` страницы вне окна не загружаются. ``transform`` — как
+        в iter_pages.
+        """
+        if column_id is not None and (columns is not None or board_id is not None):
+            raise ValueError("column_id не сочетается с columns и board_id")
+        window = _TaskWindow(since, until, self.task_order, fields, transform)
+        if board_id is not None:
+            board_columns = self.board_columns(board_id, include_deleted)
+            columns = board_columns if columns is None else [c for c in board_columns if c in columns]
+        if columns is None:
+            yield from self._iter_task_pages(_task_params(column_id, include_deleted), window)
+        else:
+            yield from self._iter_columns(columns, window, include_deleted)
+
+    def list_tasks(self, **filters) -> list[dict]:
+        """Все задачи с фильтрами iter_tasks"""
+        items = []
+        for batch in self.iter_tasks(**filters):
+            items.extend(batch)
+        return items
 
     def get_all_sticker_states(self) -> dict[str, tuple[str, str, str]]:
         """Возвращает {state_id: (state_name, parent_id, parent_name)}"""
         states_map = {}
-        for endpoint in ["string-stickers", "sprint-stickers"]:
-            data = _get(urljoin(self.base_url, endpoint), self.headers)
-            if data and "content" in data:
-                for group in data["content"]:
-                    if isinstance(group, dict):
-                        parent_id = str(group.get("id", ""))
-                        parent_name = str(group.get("name", ""))
-                        for state in group.get("states", []):
-                            if "id" in state and "name" in state:
-                                state_id = str(state["id"])
-                                state_name = str(state["name"])
-                                states_map[state_id] = (state_name, parent_id, parent_name)
-            time.sleep(0.5)
+        for endpoint in STICKER_ENDPOINTS:
+            _collect_sticker_states(self._get(endpoint), states_map)
         return states_map
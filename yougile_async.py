@@ -0,0 +1,371 @@
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from urllib.parse import urljoin
+
+import aiohttp
+from tenacity import (retry, wait_exponential, stop_after_attempt,
+                      retry_if_exception_type, retry_if_not_exception_type)
+
+from yougile_api import (
+    API_BASE, COLUMN_ATTEMPTS, DEFAULT_CONCURRENCY, DEFAULT_POOL_SIZE, DEFAULT_REQUESTS_PER_SECOND,
+    MAX_PAGE_SIZE, MAX_THROTTLED_RETRIES, PAGE_SIZE, SKIP_MIN_PAGES, STICKER_ENDPOINTS,
+    STREAM_CHUNK_SIZE, TASK_ORDERS,
+    HttpStats, RateLimitError, YougileError,
+    _ContentStream, _Skipped, _TaskWindow, _auth_headers, _board_columns, _cache_page, _collect_sticker_states,
+    _conditional_headers, _count_retry, _task_params, _task_seconds, get_rate_limiter, loads,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncYougileClient:
+    """asyncio-вариант YougileClient на aiohttp.
+
+    Делит с синхронным клиентом лимитер токена (get_rate_limiter), поэтому
+    одновременная работа обоих не превышает квоту.
+    """
+
+    def __init__(self, api_bearer_token: str,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 pool_size: int = DEFAULT_POOL_SIZE,
+                 max_requests_per_second: float | None = None,
+                 base_url: str = API_BASE,
+                 page_size: int = PAGE_SIZE,
+                 stream_json: bool = False,
+                 task_order: str | None = None):
+        self.base_url = base_url
+        self.headers = _auth_headers(api_bearer_token)
+        self.concurrency = max(1, concurrency)
+        self.page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        self.stream_json = stream_json
+        if task_order and task_order not in TASK_ORDERS:
+            raise ValueError(f"task_order: {task_order!r}, ожидается одно из {TASK_ORDERS}")
+        self.task_order = task_order or None
+        self.pool_size = max(pool_size, self.concurrency)
+        self.limiter = get_rate_limiter(api_bearer_token, requests_per_second, max_requests_per_second)
+        self.http_stats = HttpStats()
+        self._session: aiohttp.ClientSession | None = None
+        self._board_columns: dict[str, list[tuple[str, bool]]] | None = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def stats(self) -> dict:
+        return self.http_stats.snapshot()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            trace = aiohttp.TraceConfig()
+
+            async def on_connection_create_end(session, ctx, params):
+                self.http_stats.add(connections_opened=1)
+
+            trace.on_connection_create_end.append(on_connection_create_end)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=30),
+                trace_configs=[trace],
+            )
+        return self._session
+
+    async def _acquire(self):
+        delay = self.limiter.reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Запрос отменён до отправки: забронированный токен возвращается в бюджет
+                self.limiter.refund()
+                raise
+        pause = self.limiter.pause_remaining()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    @retry(wait=wait_exponential(multiplier=2, min=2, max=60),
+           stop=stop_after_attempt(10),
+           retry=(retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, YougileError))
+                  & retry_if_not_exception_type(RateLimitError)),
+           before_sleep=_count_retry)
+    async def _get_response(self, endpoint: str, params: dict | None = None,
+                            headers: dict | None = None, stream: bool = False,
+                            transform: Callable | None = None,
+                            skip: Callable[[], bool] | None = None) -> tuple[int, dict, bytes | list]:
+        """(статус, заголовки, тело) с проверкой статуса; 404 и 304 возвращаются как есть.
+
+        С ``stream`` тело успешного ответа — элементы content, разобранные
+        по мере прихода байт (см. YougileClient._get_items). ``skip`` — как
+        в YougileClient._request.
+        """
+        url = urljoin(self.base_url, endpoint)
+        session = self._get_session()
+        for _ in range(MAX_THROTTLED_RETRIES):
+            await self._acquire()
+            if skip is not None and skip():
+                self.limiter.refund()
+                raise _Skipped(endpoint)
+            async with session.get(url, params=params, headers=headers) as r:
+                if stream and r.ok:
+                    self.http_stats.add(requests=1)
+                    self.limiter.on_success(r.headers)
+                    return r.status, r.headers, await self._read_items(r, endpoint, transform)
+                body = await r.read()
+                wire = r.content_length if r.content_length is not None else len(body)
+                self.http_stats.add(requests=1, bytes_received=wire, bytes_decoded=len(body))
+                if r.status == 429:
+                    self.http_stats.add(throttled=1)
+                    self.limiter.on_throttled(r.headers)
+                    continue
+                if r.ok:
+                    self.limiter.on_success(r.headers)
+                if r.status == 401:
+                    raise YougileError("Unauthorized. Проверьте Bearer-токен.")
+                if not r.ok and r.status != 404:
+                    raise YougileError(f"HTTP {r.status}: {body[:200].decode(errors='replace')}")
+                return r.status, r.headers, body
+        raise RateLimitError(f"Rate limited (429) {MAX_THROTTLED_RETRIES} раз подряд: {endpoint}")
+
+    async def _read_items(self, r: aiohttp.ClientResponse, endpoint: str,
+                          transform: Callable | None) -> list:
+        stream = _ContentStream()
+        items = []
+        decoded = 0
+        try:
+            async for chunk in r.content.iter_chunked(STREAM_CHUNK_SIZE):
+                decoded += len(chunk)
+                try:
+                    ready = stream.feed(chunk)
+                except ValueError as e:
+                    raise YougileError(f"Некорректный JSON {endpoint}: {e}") from e
+                items.extend(ready if transform is None else map(transform, ready))
+            try:
+                ready = stream.close()
+            except ValueError as e:
+                raise YougileError(f"Некорректный JSON {endpoint}: {e}") from e
+            items.extend(ready if transform is None else map(transform, ready))
+        finally:
+            wire = r.content_length if r.content_length is not None else decoded
+            self.http_stats.add(bytes_received=wire, bytes_decoded=decoded)
+        return items
+
+    async def _get(self, endpoint: str, params: dict | None = None,
+                   skip: Callable[[], bool] | None = None) -> dict | None:
+        status, _, body = await self._get_response(endpoint, params, skip=skip)
+        if status == 404:
+            return None
+        return loads(body)
+
+    async def fetch_pages(self, endpoint: str, cached_pages: list[dict] | None = None,
+                          paginated: bool = True, page_size: int | None = None) -> list[dict]:
+        """Как YougileClient.fetch_pages: страницы справочника с условными запросами"""
+        page_size = page_size or self.page_size
+        pages = []
+        page = 0
+        while True:
+            cached = cached_pages[page] if cached_pages and page < len(cached_pages) else None
+            params = {"offset": page * page_size, "limit": page_size} if paginated else None
+            status, headers, body = await self._get_response(endpoint, params, _conditional_headers(cached))
+            if status == 304 and cached is not None:
+                self.http_stats.add(not_modified=1)
+                pages.append(cached)
+            else:
+                data = loads(body) if status != 404 else None
+                content = (data or {}).get("content", []) if paginated else data
+                pages.append(_cache_page(content, headers))
+            content = pages[-1]["content"]
+            if not paginated or len(content or []) < page_size:
+                return pages
+            page += 1
+
+    async def _fetch_page(self, endpoint: str, page: int, page_size: int,
+                          params: dict | None = None, transform: Callable | None = None,
+                          skip: Callable[[], bool] | None = None) -> list:
+        params = {**(params or {}), "offset": page * page_size, "limit": page_size}
+        try:
+            if self.stream_json:
+                status, _, items = await self._get_response(endpoint, params, stream=True,
+                                                            transform=transform, skip=skip)
+                return items if status != 404 else []
+            data = await self._get(endpoint, params=params, skip=skip)
+        except _Skipped:
+            return []
+        if not data:
+            return []
+        content = data.get("content", [])
+        return content if transform is None else list(map(transform, content))
+
+    async def iter_pages(self, endpoint: str, page_size: int | None = None, params: dict | None = None,
+                         transform: Callable | None = None, first_page: int = 0) -> AsyncIterator[list]:
+        """Как YougileClient.iter_pages: окно из ``concurrency`` страниц вперёд"""
+        page_size = page_size or self.page_size
+        short_pages = []
+
+        def past_end(n: int) -> bool:
+            return bool(short_pages) and n > min(short_pages)
+
+        async def fetch(n: int) -> list:
+            batch = await self._fetch_page(endpoint, n, page_size, params, transform, skip=lambda: past_end(n))
+            if len(batch) < page_size:
+                short_pages.append(n)
+            return batch
+
+        pending: dict[int, asyncio.Task] = {}
+        next_page = first_page
+        page = first_page
+        try:
+            while True:
+                while len(pending) < self.concurrency and not past_end(next_page):
+                    pending[next_page] = asyncio.create_task(fetch(next_page))
+                    next_page += 1
+                batch = await pending.pop(page)
+                if batch:
+                    yield batch
+                if len(batch) < page_size:
+                    return
+                page += 1
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+    async def _list_paginated(self, endpoint: str, page_size: int | None = None) -> list[dict]:
+        items = []
+        async for batch in self.iter_pages(endpoint, page_size):
+            items.extend(batch)
+        return items
+
+    async def list_boards(self) -> list[dict]:
+        return await self._list_paginated("boards")
+
+    async def list_users(self) -> list[dict]:
+        return await self._list_paginated("users")
+
+    async def list_columns(self) -> list[dict]:
+        return await self._list_paginated("columns")
+
+    async def board_columns(self, board_id: str, include_deleted: bool = False) -> list[str]:
+        """Как YougileClient.board_columns"""
+        if self._board_columns is None:
+            self._board_columns = _board_columns(await self.list_columns())
+        return [column_id for column_id, deleted in self._board_columns.get(board_id, ())
+                if include_deleted or not deleted]
+
+    async def _probe_leading(self, params: dict, offset: int, window: _TaskWindow) -> bool:
+        data = await self._get("task-list", params={**params, "offset": offset, "limit": 1})
+        content = (data or {}).get("content") or []
+        ts = _task_seconds(content[0]) if content else None
+        return ts is not None and window.leading(ts)
+
+    async def _skip_pages(self, params: dict, page_size: int, window: _TaskWindow) -> int:
+        """Как YougileClient._skip_pages"""
+        if not await self._probe_leading(params, SKIP_MIN_PAGES * page_size, window):
+            return 0
+        low, high = SKIP_MIN_PAGES, SKIP_MIN_PAGES * 2
+        while await self._probe_leading(params, high * page_size, window):
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if await self._probe_leading(params, mid * page_size, window):
+                low = mid
+            else:
+                high = mid
+        return low - 1
+
+    async def _iter_task_pages(self, params: dict, window: _TaskWindow) -> AsyncIterator[list]:
+        if not window.active:
+            async for page in self.iter_pages("task-list", params=params, transform=window.transform):
+                yield page
+            return
+        first_page = await self._skip_pages(params, self.page_size, window) if window.order else 0
+        pages = self.iter_pages("task-list", params=params, transform=window.item, first_page=first_page)
+        try:
+            async for page in pages:
+                items, done = window.page(page)
+                if items:
+                    yield items
+                if done:
+                    return
+        finally:
+            # Забегающие вперёд запросы отменяются сразу, а не при сборке мусора
+            await pages.aclose()
+
+    async def _fetch_column_page(self, column_id: str, page: int | None, window: _TaskWindow,
+                                 include_deleted: bool) -> tuple[int, list]:
+        params = _task_params(column_id, include_deleted)
+        if page is None:
+            page = await self._skip_pages(params, self.page_size, window) if window.order else 0
+        transform = window.item if window.active else window.transform
+        return page, await self._fetch_page("task-list", page, self.page_size, params, transform)
+
+    async def _iter_columns(self, columns: list[str], window: _TaskWindow,
+                            include_deleted: bool) -> AsyncIterator[list]:
+        """Как YougileClient._iter_columns"""
+        queue = deque((column_id, None, 1) for column_id in columns)
+        running: dict[asyncio.Task, tuple] = {}
+        try:
+            while queue or running:
+                while queue and len(running) < self.concurrency:
+                    column_id, page, attempt = queue.popleft()
+                    task = asyncio.create_task(self._fetch_column_page(column_id, page, window, include_deleted))
+                    running[task] = (column_id, page, attempt)
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    column_id, page, attempt = running.pop(task)
+                    try:
+                        page, batch = task.result()
+                    except Exception as e:
+                        if attempt >= COLUMN_ATTEMPTS:
+                            raise
+                        logger.warning(f"Колонка {column_id}: {e}; повтор {attempt}/{COLUMN_ATTEMPTS - 1}")
+                        queue.append((column_id, page, attempt + 1))
+                        continue
+                    items, stop = window.page(batch) if window.active else (batch, False)
+                    if len(batch) == self.page_size and not stop:
+                        queue.appendleft((column_id, page + 1, 1))
+                    if items:
+                        yield items
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def iter_tasks(self, transform: Callable | None = None, *, column_id: str | None = None,
+                         columns: list[str] | None = None, board_id: str | None = None,
+                         since: float | None = None, until: float | None = None,
+                         include_deleted: bool = False,
+                         fields: tuple[str, ...] | None = None) -> AsyncIterator[list]:
+        """Как YougileClient.iter_tasks"""
+        if column_id is not None and (columns is not None or board_id is not None):
+            raise ValueError("column_id не сочетается с columns и board_id")
+        window = _TaskWindow(since, until, self.task_order, fields, transform)
+        if board_id is not None:
+            board_columns = await self.board_columns(board_id, include_deleted)
+            columns = board_columns if columns is None else [c for c in board_columns if c in columns]
+        pages = (self._iter_task_pages(_task_params(column_id, include_deleted), window) if columns is None
+                 else self._iter_columns(columns, window, include_deleted))
+        try:
+            async for page in pages:
+                yield page
+        finally:
+            await pages.aclose()
+
+    async def list_tasks(self, **filters) -> list[dict]:
+        items = []
+        async for batch in self.iter_tasks(**filters):
+            items.extend(batch)
+        return items
+
+    async def get_all_sticker_states(self) -> dict[str, tuple[str, str, str]]:
+        states_map = {}
+        for data in await asyncio.gather(*(self._get(endpoint) for endpoint in STICKER_ENDPOINTS)):
+            _collect_sticker_states(data, states_map)
+        return states_map